@@ -0,0 +1 @@
+"""Shared building blocks for the AT Support Item Lookup Tool."""
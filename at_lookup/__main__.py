@@ -0,0 +1,139 @@
+"""Command-line entry point: `python -m at_lookup <command>`."""
+import argparse
+import sys
+
+from at_lookup import catalogue, config
+
+
+def cmd_build_catalogue(args):
+    for source in args.sources:
+        dest = catalogue.build_artifact(source, args.out if len(args.sources) == 1 else None)
+        print(f"{source} -> {dest}")
+
+
+def cmd_batch(args):
+    from at_lookup.batch import read_requests, run
+    from at_lookup.llm import make_client
+    from at_lookup.response_cache import get_response_cache
+
+    requests = read_requests(args.refs, args.context)
+    cache = None if args.no_cache else get_response_cache()
+    records = run(make_client(), requests, args.out, args.markdown, args.catalogue,
+                  cache=cache, concurrency=args.concurrency, force_refresh=args.force_refresh)
+    failed = [r for r in records if r.get("error")]
+    if failed or len(records) < len(requests):
+        sys.exit(1)
+
+
+def cmd_warm(args):
+    from at_lookup.llm import make_client
+    from at_lookup.response_cache import get_response_cache
+    from at_lookup.warm import plan, warm
+
+    cat = catalogue.get_catalogue(args.catalogue)
+    cache = get_response_cache()
+    if args.dry_run:
+        todo, stale = plan(cat, cache)
+        print(f"{len(cat)} rows, {len(todo)} to generate, {len(stale)} to remove")
+        return
+    if warm(make_client(), cat, cache, concurrency=args.concurrency, limit=args.limit):
+        sys.exit(1)
+
+
+def cmd_build_embeddings(args):
+    from at_lookup import semantic
+
+    if args.model is None and not semantic.model_available():
+        sys.exit("sentence-transformers is not installed; run "
+                 "`pip install -r requirements-semantic.txt` (or pass --model hashing-v1 "
+                 "for a lexical index that is not served as meaning search)")
+    cat = catalogue.get_catalogue(args.catalogue)
+    dest = semantic.build_embeddings(cat, args.out or semantic.embeddings_path(args.catalogue),
+                                     args.model)
+    print(f"{args.catalogue} -> {dest}")
+
+
+def cmd_build_assets(args):
+    from at_lookup.assets import build_assets
+
+    for source, width, size in build_assets():
+        print(f"{source} @ {width}px -> {size / 1024:.0f} KB")
+
+
+def cmd_serve(args):
+    from at_lookup.serve import serve
+
+    serve(args.workers, args.host, args.port, args.worker_port)
+
+
+def cmd_api(args):
+    import uvicorn
+
+    uvicorn.run("at_lookup.api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m at_lookup")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build-catalogue", help="Compile the code guide into an Arrow artifact")
+    p.add_argument("sources", nargs="*", default=[catalogue.DEFAULT_PATH],
+                   help="docx/csv/xlsx code guide(s) (default: %(default)s)")
+    p.add_argument("--out", help="Output path (single source only)")
+    p.set_defaults(func=cmd_build_catalogue)
+
+    p = sub.add_parser("batch", help="Generate market analyses for a file of Ref Nos.")
+    p.add_argument("refs", help="Text file with one Ref No. per line, optionally followed by "
+                                "a tab and additional context")
+    p.add_argument("--context", default="", help="Additional context for lines without their own")
+    p.add_argument("--out", default="analyses.jsonl",
+                   help="JSONL results; existing results are skipped on re-run (default: %(default)s)")
+    p.add_argument("--markdown", help="Also write a Markdown report to this path")
+    p.add_argument("--catalogue", help="Code guide to look Ref Nos. up in")
+    p.add_argument("--concurrency", type=int, default=4, help="Parallel requests (default: %(default)s)")
+    p.add_argument("--force-refresh", action="store_true",
+                   help="Ignore previous results and cached analyses")
+    p.add_argument("--no-cache", action="store_true", help="Do not read or write the response cache")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("warm", help="Precompute the default report for every catalogue row")
+    p.add_argument("--catalogue", default=catalogue.DEFAULT_PATH,
+                   help="Code guide to walk (default: %(default)s)")
+    p.add_argument("--concurrency", type=int, default=4, help="Parallel requests (default: %(default)s)")
+    p.add_argument("--limit", type=int, help="Generate at most this many reports")
+    p.add_argument("--dry-run", action="store_true", help="Only report how much work there is")
+    p.set_defaults(func=cmd_warm)
+
+    p = sub.add_parser("build-embeddings", help="Embed every catalogue row for semantic search")
+    p.add_argument("--catalogue", default=catalogue.DEFAULT_PATH,
+                   help="Code guide to embed (default: %(default)s)")
+    p.add_argument("--model", help="sentence-transformers model name (default: "
+                                   "AT_EMBEDDING_MODEL), or 'hashing-v1' to check the pipeline "
+                                   "offline; hashing-v1 is not served as meaning search")
+    p.add_argument("--out", help="Output .npy path")
+    p.set_defaults(func=cmd_build_embeddings)
+
+    p = sub.add_parser("build-assets", help="Pre-render the downscaled WebP images")
+    p.set_defaults(func=cmd_build_assets)
+
+    p = sub.add_parser("serve", help="Run the app as several workers behind a sticky load balancer")
+    p.add_argument("--workers", type=int, default=config.WORKERS,
+                   help="Streamlit worker processes; 1 runs the app directly (default: %(default)s)")
+    p.add_argument("--host", default="0.0.0.0", help="Public address (default: %(default)s)")
+    p.add_argument("--port", type=int, default=8501, help="Public port (default: %(default)s)")
+    p.add_argument("--worker-port", type=int, default=8601,
+                   help="First local worker port (default: %(default)s)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("api", help="Serve the HTTP/JSON API")
+    p.add_argument("--host", default="127.0.0.1", help="Address to bind (default: %(default)s)")
+    p.add_argument("--port", type=int, default=8000, help="Port (default: %(default)s)")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    p.set_defaults(func=cmd_api)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
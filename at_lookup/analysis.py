@@ -0,0 +1,100 @@
+"""One market analysis for a catalogue row, served from the response cache when possible."""
+import time
+
+from at_lookup import config
+from at_lookup.catalogue import DESC_COL, ITEM_COL, REF_COL, normalise_ref
+from at_lookup.llm import complete, is_cacheable, stream_text, with_retries
+from at_lookup.metrics import RequestTrace
+from at_lookup.prompt import PROMPT_VERSION, build_system_prompt, build_user_prompt
+from at_lookup.response_cache import make_key
+from at_lookup.sections import SectionStream, parse_sections
+
+
+def _prompts(item, extra_ctx, model):
+    system_prompt = build_system_prompt()
+    user_prompt = build_user_prompt(item[ITEM_COL].strip(), item[DESC_COL].strip(), extra_ctx)
+    return system_prompt, user_prompt, make_key(system_prompt, user_prompt, model, PROMPT_VERSION)
+
+
+def analyse(client, item, extra_ctx="", cache=None, force_refresh=False, model=None,
+            source="batch"):
+    """Return `(sections, cached)` for a catalogue row as returned by `Catalogue.lookup`."""
+    model = model or config.MODEL
+    trace = RequestTrace(source, model=model, mode="complete", ref=item[REF_COL])
+    try:
+        system_prompt, user_prompt, key = _prompts(item, extra_ctx, model)
+        with trace.phase("cache_lookup"):
+            report = None if force_refresh or cache is None else cache.get(key)
+        cached = report is not None
+        trace.set(cache="hit" if cached else "miss")
+        if report is None:
+            finish = []
+            with trace.phase("generation"):
+                report = with_retries(complete, client, model, system_prompt, user_prompt,
+                                      on_usage=trace.record_usage, on_finish=finish.append)
+            if cache is not None and is_cacheable(report, finish[-1] if finish else None):
+                cache.put(key, report, ref_key=normalise_ref(item[REF_COL]),
+                          model=model, prompt_version=PROMPT_VERSION)
+        with trace.phase("parse"):
+            sections = parse_sections(report)
+    except Exception:
+        trace.finish(status="error")
+        raise
+    trace.finish()
+    return sections, cached
+
+
+def analyse_stream(client, item, extra_ctx="", cache=None, force_refresh=False, model=None,
+                   source="api", interval=0.1):
+    """Yield `("section", num, text)` as the report arrives, then `("done", sections, cached)`.
+
+    Each update carries the section's full text so far; updates are batched to
+    at most one round per `interval` seconds. A cached report is yielded at once.
+    """
+    model = model or config.MODEL
+    trace = RequestTrace(source, model=model, mode="stream", ref=item[REF_COL])
+    status = "error"
+    try:
+        system_prompt, user_prompt, key = _prompts(item, extra_ctx, model)
+        with trace.phase("cache_lookup"):
+            report = None if force_refresh or cache is None else cache.get(key)
+        cached = report is not None
+        trace.set(cache="hit" if cached else "miss")
+        if report is None:
+            status = "api_error"
+            start = time.perf_counter()
+            chunks = stream_text(client, model, system_prompt, user_prompt,
+                                 on_usage=trace.record_usage)
+            trace.set(coalesced=chunks.joined)
+            parser = SectionStream()
+            dirty = set()
+            last = 0.0
+            try:
+                for delta in chunks:
+                    trace.mark("time_to_first_token")
+                    dirty |= parser.feed(delta)
+                    if dirty and time.monotonic() - last > interval:
+                        for num in sorted(dirty):
+                            yield "section", num, parser.sections[str(num)]
+                        dirty.clear()
+                        last = time.monotonic()
+            finally:
+                chunks.close()
+            trace.phases["generation"] = time.perf_counter() - start
+            report = parser.text
+            if cache is not None and is_cacheable(report, chunks.finish_reason):
+                cache.put(key, report, ref_key=normalise_ref(item[REF_COL]),
+                          model=model, prompt_version=PROMPT_VERSION)
+            status = "error"
+        with trace.phase("parse"):
+            sections = parse_sections(report)
+        for num in range(1, len(sections) + 1):
+            yield "section", num, sections[str(num)]
+        trace.finish()
+        yield "done", sections, cached
+    except GeneratorExit:
+        trace.finish(status="cancelled")
+        raise
+    except Exception:
+        trace.finish(status=status)
+        raise
@@ -0,0 +1,162 @@
+"""Headless HTTP/JSON API over the catalogue, search and market analysis.
+
+    python -m at_lookup api --port 8000
+
+    GET /items/{ref}                     the catalogue row for a Ref No.
+    GET /search?q=...&k=10&by=words      ranked matches; by=meaning uses the semantic index
+    GET /analysis/{ref}?context=...      the six-section analysis as JSON, or as server-sent
+                                         events with `Accept: text/event-stream` or ?stream=1
+    GET /healthz
+
+It shares the process-wide catalogue, search indexes, response cache,
+request coalescing and rate limiter with the Streamlit app, so the two can run
+side by side against the same `cache/` directory.
+"""
+import contextlib
+import json
+import os
+import threading
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from at_lookup.analysis import analyse, analyse_stream
+from at_lookup.catalogue import DEFAULT_PATH, DESC_COL, ITEM_COL, REF_COL, get_catalogue
+from at_lookup.llm import make_client
+from at_lookup.reload import watch_catalogue
+from at_lookup.response_cache import get_response_cache
+from at_lookup.search import get_search_index
+from at_lookup.semantic import get_semantic_index
+
+MAX_RESULTS = 50
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = make_client()
+    return _client
+
+
+def _error(status, message):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+def _item_json(item):
+    return {"ref_no": item[REF_COL], "support_item": item[ITEM_COL].strip(),
+            "description": item[DESC_COL].strip()}
+
+
+def _flag(request, name):
+    return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+
+async def item(request):
+    ref = request.path_params["ref"]
+    if not ref.strip():
+        return _error(400, "Ref No. is required")
+    catalogue = await run_in_threadpool(get_catalogue, DEFAULT_PATH)
+    match = catalogue.lookup(ref)
+    if match is None:
+        return _error(404, f"Ref No. '{ref}' not found")
+    return JSONResponse(_item_json(match))
+
+
+async def search(request):
+    query = request.query_params.get("q", "")
+    by = request.query_params.get("by", "words")
+    if by not in ("words", "meaning"):
+        return _error(400, "by must be 'words' or 'meaning'")
+    try:
+        k = min(MAX_RESULTS, max(1, int(request.query_params.get("k", 10))))
+    except ValueError:
+        return _error(400, "k must be an integer")
+
+    def run():
+        catalogue = get_catalogue(DEFAULT_PATH)
+        if by == "meaning":
+            index = get_semantic_index(catalogue, DEFAULT_PATH)
+            if index is None:
+                return None
+        else:
+            index = get_search_index(catalogue)
+        return index.search(query, k)
+
+    hits = await run_in_threadpool(run)
+    if hits is None:
+        return _error(409, "Semantic index not built; install requirements-semantic.txt and "
+                           "run `python -m at_lookup build-embeddings`")
+    return JSONResponse({"query": query, "by": by, "results": [
+        {"ref_no": ref, "support_item": name.strip(), "score": round(score, 4)}
+        for ref, name, score in hits
+    ]})
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _event_stream(events, item):
+    yield _sse("item", _item_json(item))
+    try:
+        for event in events:
+            if event[0] == "section":
+                yield _sse("section", {"section": event[1], "text": event[2]})
+            else:
+                yield _sse("done", {"sections": event[1], "cached": event[2]})
+    except Exception as e:
+        yield _sse("error", {"error": f"API error: {e}"})
+
+
+async def analysis(request):
+    ref = request.path_params["ref"]
+    if not ref.strip():
+        return _error(400, "Ref No. is required")
+    catalogue = await run_in_threadpool(get_catalogue, DEFAULT_PATH)
+    match = catalogue.lookup(ref)
+    if match is None:
+        return _error(404, f"Ref No. '{ref}' not found")
+    if not os.getenv("OPENAI_API_KEY"):
+        return _error(503, "OPENAI_API_KEY is not configured")
+
+    extra_ctx = request.query_params.get("context", "")
+    force_refresh = _flag(request, "refresh")
+    streaming = _flag(request, "stream") or "text/event-stream" in request.headers.get("accept", "")
+    if streaming:
+        events = analyse_stream(_get_client(), match, extra_ctx, cache=get_response_cache(),
+                                force_refresh=force_refresh)
+        return StreamingResponse(_event_stream(events, match), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    try:
+        sections, cached = await run_in_threadpool(
+            analyse, _get_client(), match, extra_ctx, cache=get_response_cache(),
+            force_refresh=force_refresh, source="api")
+    except Exception as e:
+        return _error(502, f"API error: {e}")
+    return JSONResponse({**_item_json(match), "cached": cached, "sections": sections})
+
+
+async def healthz(request):
+    return JSONResponse({"status": "ok"})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    if os.path.exists(DEFAULT_PATH):
+        watch_catalogue(DEFAULT_PATH, get_response_cache())
+    yield
+
+
+app = Starlette(lifespan=lifespan, routes=[
+    Route("/items/{ref}", item),
+    Route("/search", search),
+    Route("/analysis/{ref}", analysis),
+    Route("/healthz", healthz),
+])
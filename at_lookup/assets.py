@@ -0,0 +1,78 @@
+"""Right-sized, compressed copies of the app's images.
+
+The source PNGs are 1024px and ~1.4 MB each but are shown at 128-300px. Each
+variant is rendered once at twice its display width (for high-DPI screens) as
+WebP, written to `cache/assets/` so restarts skip the resize, and held in
+memory for the life of the process. Passing the same bytes object to
+`st.image` on every rerun keeps Streamlit's content-hashed media URL stable,
+so browsers reuse the image they already have.
+"""
+import os
+import threading
+from io import BytesIO
+
+from at_lookup.config import CACHE_DIR
+
+MASCOT = "data/BillyTBot.png"
+SPINNER_ICON = "data/billy_tea_icon.png"
+
+# (source, display width) pairs used by the app; prebuilt by `build-assets`
+VARIANTS = [(MASCOT, 300), (SPINNER_ICON, 128)]
+
+ASSET_DIR = os.path.join(CACHE_DIR, "assets")
+SCALE = 2
+QUALITY = 85
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _variant_path(source, width, mtime_ns):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(ASSET_DIR, f"{stem}-{width}w-{mtime_ns}.webp")
+
+
+def render_variant(source, width):
+    from PIL import Image
+
+    with Image.open(source) as im:
+        im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
+        target = min(width * SCALE, im.width)
+        height = round(im.height * target / im.width)
+        im = im.resize((target, height), Image.LANCZOS)
+        out = BytesIO()
+        im.save(out, format="WEBP", quality=QUALITY, method=6)
+    return out.getvalue()
+
+
+def image_variant(source, width):
+    """WebP bytes of `source` sized for display at `width` CSS pixels."""
+    mtime_ns = os.stat(source).st_mtime_ns
+    key = (source, width)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        path = _variant_path(source, width, mtime_ns)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = render_variant(source, width)
+            try:
+                os.makedirs(ASSET_DIR, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                pass  # read-only cache dir: keep the in-memory copy only
+        _cache[key] = (mtime_ns, data)
+        return data
+
+
+def build_assets():
+    return [(source, width, len(image_variant(source, width))) for source, width in VARIANTS]
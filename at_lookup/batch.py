@@ -0,0 +1,106 @@
+"""Headless batch analysis of a list of Support Item Ref Nos."""
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from at_lookup.analysis import analyse
+from at_lookup.catalogue import DESC_COL, ITEM_COL, get_catalogue, normalise_ref
+from at_lookup.sections import TAB_LABELS
+
+
+def read_requests(path, default_ctx=""):
+    """Read `ref` or `ref<TAB>context` lines; blank lines and `#` comments are skipped."""
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            ref, _, ctx = line.partition("\t")
+            requests.append((ref.strip(), ctx.strip() or default_ctx))
+    return requests
+
+
+def _request_id(ref, ctx):
+    return f"{normalise_ref(ref)}\t{ctx.strip()}"
+
+
+def load_done(out_path):
+    """Requests already finished in a previous run; failed API calls are retried."""
+    done = {}
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a half-written line from an interrupted run
+            if record.get("error") and not record.get("not_found"):
+                continue
+            done[_request_id(record["ref"], record.get("context", ""))] = record
+    return done
+
+
+def analyse_one(client, catalogue, cache, ref, ctx, force_refresh=False):
+    record = {"ref": ref, "context": ctx, "error": None}
+    item = catalogue.lookup(ref)
+    if item is None:
+        record.update(error=f"Ref No. '{ref}' not found.", not_found=True)
+        return record
+    record["support_item"] = item[ITEM_COL].strip()
+    record["description"] = item[DESC_COL].strip()
+    try:
+        record["sections"], record["cached"] = analyse(
+            client, item, ctx, cache=cache, force_refresh=force_refresh
+        )
+    except Exception as e:
+        record["error"] = f"API error: {e}"
+    return record
+
+
+def write_markdown(records, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(f"# {record['ref']}: {record.get('support_item', '')}\n\n")
+            if record.get("context"):
+                f.write(f"_Additional context: {record['context']}_\n\n")
+            if record.get("error"):
+                f.write(f"**{record['error']}**\n\n")
+                continue
+            f.write(f"**Description:** {record['description']}\n\n")
+            for i, label in enumerate(TAB_LABELS, start=1):
+                f.write(f"## {label}\n\n{record['sections'][str(i)]}\n\n")
+
+
+def run(client, requests, out_path, markdown_path=None, catalogue_path=None,
+        cache=None, concurrency=4, force_refresh=False, log=sys.stderr):
+    catalogue = get_catalogue(catalogue_path) if catalogue_path else get_catalogue()
+    done = {} if force_refresh else load_done(out_path)
+    todo = [(ref, ctx) for ref, ctx in requests if _request_id(ref, ctx) not in done]
+    print(f"{len(requests)} requested, {len(requests) - len(todo)} already done, "
+          f"{len(todo)} to run", file=log)
+
+    write_lock = threading.Lock()
+    with open(out_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(analyse_one, client, catalogue, cache, ref, ctx, force_refresh)
+                   for ref, ctx in todo]
+        for n, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            with write_lock:
+                # One line per finished request so an interrupted run can resume
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+            done[_request_id(record["ref"], record["context"])] = record
+            status = record["error"] or ("cached" if record.get("cached") else "ok")
+            print(f"[{n}/{len(todo)}] {record['ref']}: {status}", file=log)
+
+    # Markdown follows the input order, including results from earlier runs
+    records = [done[_request_id(ref, ctx)] for ref, ctx in requests
+               if _request_id(ref, ctx) in done]
+    if markdown_path:
+        write_markdown(records, markdown_path)
+    return records
@@ -0,0 +1,501 @@
+"""Support-item catalogue: parsing the NDIS Code Guide and looking items up by Ref No."""
+import bisect
+import csv
+import hashlib
+import io
+import itertools
+import os
+import threading
+import zipfile
+from collections.abc import Mapping
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from at_lookup.config import CACHE_DIR
+
+REF_COL = "Support Item Ref No."
+ITEM_COL = "Support Item"
+DESC_COL = "Description"
+REQUIRED_COLUMNS = {REF_COL, ITEM_COL, DESC_COL}
+KEY_COL = "_ref_key"
+
+DEFAULT_PATH = os.path.join("data", "support_items.docx")
+# Rows per Arrow record batch when compiling a guide
+BATCH_ROWS = 8192
+# Bump when compiling changes which rows or values an artifact holds, so old ones are rebuilt
+ARTIFACT_VERSION = "2"
+
+
+def normalise_ref(ref_no):
+    return str(ref_no).strip().upper()
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _TBL, _TR, _TC, _P = _W + "body", _W + "tbl", _W + "tr", _W + "tc", _W + "p"
+_R, _HYPERLINK, _T, _BR = _W + "r", _W + "hyperlink", _W + "t", _W + "br"
+_TCPR, _TRPR, _VAL = _W + "tcPr", _W + "trPr", _W + "val"
+# Run children that stand for one character, as python-docx renders them
+_CHARS = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            runs = (child,)
+        elif child.tag == _HYPERLINK:
+            runs = [r for r in child if r.tag == _R]
+        else:
+            continue
+        for r in runs:
+            for e in r:
+                if e.tag == _T:
+                    parts.append(e.text or "")
+                elif e.tag == _BR:
+                    # Page and column breaks have no text
+                    if e.get(_W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif e.tag in _CHARS:
+                    parts.append(_CHARS[e.tag])
+    return "".join(parts)
+
+
+def _row_cells(tr, above):
+    """Cell texts of a `w:tr` laid out like python-docx's `_Row.cells`.
+
+    A cell spanning N grid columns appears N times and a vertically merged
+    cell repeats the one above it. Returns `(cells, starts)`, where `starts`
+    maps grid offsets to cell texts for the next row's merges.
+    """
+    offset = 0
+    trPr = tr.find(_TRPR)
+    if trPr is not None and trPr.find(_W + "gridBefore") is not None:
+        offset = int(trPr.find(_W + "gridBefore").get(_VAL))
+    cells, starts = [], {}
+    for tc in tr:
+        if tc.tag != _TC:
+            continue
+        span, merge = 1, None
+        tcPr = tc.find(_TCPR)
+        if tcPr is not None:
+            grid_span = tcPr.find(_W + "gridSpan")
+            if grid_span is not None:
+                span = int(grid_span.get(_VAL))
+            v_merge = tcPr.find(_W + "vMerge")
+            if v_merge is not None:
+                merge = v_merge.get(_VAL, "continue")
+        if merge == "continue":
+            texts = above.get(offset, [""] * span)
+        else:
+            texts = ["\n".join(_paragraph_text(p) for p in tc if p.tag == _P)] * span
+        starts[offset] = texts
+        cells.extend(texts)
+        offset += span
+    return cells, starts
+
+
+def iter_docx_rows(file):
+    """Yield `(table_no, cells)` for every row of every top-level table in a .docx.
+
+    Streams `word/document.xml` and frees each row once read, instead of
+    building python-docx's object model; cell text matches `_Cell.text`.
+    """
+    from lxml import etree
+
+    table_no, above = -1, {}
+    with zipfile.ZipFile(file) as package, package.open("word/document.xml") as xml:
+        events = etree.iterparse(xml, events=("start", "end"), tag=(_TBL, _TR, _P), huge_tree=True)
+        for event, el in events:
+            parent = el.getparent()
+            if event == "start":
+                if el.tag == _TBL and parent.tag == _BODY:
+                    table_no, above = table_no + 1, {}
+                continue
+            if el.tag == _TR:
+                if parent.tag != _TBL or parent.getparent().tag != _BODY:
+                    continue
+                cells, above = _row_cells(el, above)
+                yield table_no, cells
+            elif parent.tag != _BODY:
+                continue
+            # Drop what has been read so memory stays flat however long the guide is
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+
+
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+def iter_records(file):
+    """Yield `(headers, values)` for each data row of a docx, csv or xlsx guide as it is read.
+
+    `headers` is the same list object for every row of one table. docx cells
+    are stripped; tables without the required columns are skipped. csv and
+    xlsx cells are kept as the text in the file.
+    """
+    name = file.name.lower()
+    if name.endswith(".docx"):
+        for _, rows in itertools.groupby(iter_docx_rows(file), key=lambda row: row[0]):
+            headers = [c.strip() for c in next(rows)[1]]
+            if REQUIRED_COLUMNS.issubset(headers):
+                for _, cells in rows:
+                    yield headers, [cells[idx].strip() for idx in range(len(headers))]
+    elif name.endswith(".csv"):
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        headers = next(reader, None)
+        if headers is not None:
+            for values in reader:
+                yield headers, values
+    elif name.endswith(".xlsx"):
+        # Read-only mode streams the sheet instead of loading the whole workbook
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            headers = [_cell(v) for v in next(rows, ())]
+            for values in rows:
+                yield headers, [_cell(v) for v in values]
+        finally:
+            workbook.close()
+    elif name.endswith(".xls"):
+        import pandas as pd
+
+        df = pd.read_excel(file, dtype=str).fillna("")
+        headers = [str(c) for c in df.columns]
+        for values in df.itertuples(index=False):
+            yield headers, list(values)
+
+
+def iter_batches(records, batch_rows=BATCH_ROWS):
+    """Group `iter_records` rows into Arrow record batches of strings plus the Ref No. key.
+
+    Columns are matched by name across tables. A table with columns not seen
+    before widens the schema of the batches that follow (see `_widen`), and
+    cells a table does not have are empty. The first row for each Ref No. wins,
+    and rows without one (blank or spacer rows) are dropped.
+    """
+    columns = positions = last_headers = None
+    seen = set()
+    buffer = []
+    for headers, values in records:
+        if headers is not last_headers:
+            names = [h.strip() for h in headers]
+            if columns is None:
+                columns = []
+                missing = REQUIRED_COLUMNS - set(names)
+                if missing:
+                    raise ValueError(f"Catalogue is missing columns: {', '.join(sorted(missing))}")
+            new = [n for n in dict.fromkeys(names) if n not in columns]
+            if new:
+                if buffer:
+                    yield _batch(buffer, schema)
+                    buffer = []
+                columns += new
+                schema = pa.schema([(c, pa.string()) for c in columns + [KEY_COL]])
+            # Like a dict built from the row, a repeated header takes its last cell
+            last = {name: idx for idx, name in enumerate(names)}
+            positions = [last.get(c) for c in columns]
+            # The usual case: cells already in column order, so rows are used as they are
+            in_order = positions == list(range(len(columns)))
+            ref_pos = last[REF_COL]
+            last_headers = headers
+        key = normalise_ref(values[ref_pos] if ref_pos < len(values) else "")
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        if not (in_order and len(values) == len(positions)):
+            values = [values[i] if i is not None and i < len(values) else "" for i in positions]
+        values.append(key)
+        buffer.append(values)
+        if len(buffer) >= batch_rows:
+            yield _batch(buffer, schema)
+            buffer = []
+    if buffer:
+        yield _batch(buffer, schema)
+
+
+def _batch(rows, schema):
+    return pa.RecordBatch.from_arrays([pa.array(c, pa.string()) for c in zip(*rows)], schema=schema)
+
+
+def _widen(batch, schema):
+    """`batch` with the columns of the wider `schema`, filling ones it lacks with ""."""
+    if batch.schema.equals(schema):
+        return batch
+    names = set(batch.schema.names)
+    return pa.RecordBatch.from_arrays(
+        [batch.column(f.name) if f.name in names else pa.repeat("", batch.num_rows).cast(f.type)
+         for f in schema], schema=schema)
+
+
+class Strings:
+    """A read-only sequence of the Python strings in an Arrow string array, for `bisect`."""
+
+    __slots__ = ("array",)
+
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, i):
+        return self.array[i].as_py()
+
+
+class Row(Mapping):
+    """One catalogue row. Each column is read from the table when it is used, so
+    the columns nobody asks for are never turned into Python strings."""
+
+    __slots__ = ("_catalogue", "_pos")
+
+    def __init__(self, catalogue, pos):
+        self._catalogue = catalogue
+        self._pos = pos
+
+    def __getitem__(self, col):
+        if col not in self._catalogue.columns:
+            raise KeyError(col)
+        return self._catalogue.table.column(col)[self._pos].as_py()
+
+    def __iter__(self):
+        return iter(self._catalogue.columns)
+
+    def __len__(self):
+        return len(self._catalogue.columns)
+
+    def __repr__(self):
+        return f"Row({dict(self)!r})"
+
+
+class Catalogue:
+    """A compiled code guide, looked up by normalised Ref No. with a binary search.
+
+    Row data stays in the Arrow table, memory-mapped and shared by every
+    process reading the artifact. The only per-process state is `order`, the
+    row positions sorted by Ref No., and the keys in that order.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.columns = [c for c in table.column_names if c != KEY_COL]
+        self.keys = table.column(KEY_COL)
+        self.order = pc.sort_indices(self.keys).to_numpy()
+        self.sorted_keys = self.keys.take(self.order).combine_chunks()
+        # Hand the sort's scratch space back rather than keeping it in every worker
+        pa.default_memory_pool().release_unused()
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def key(self, pos):
+        return self.keys[pos].as_py()
+
+    def position(self, ref_no):
+        """Row position of a Ref No., or None."""
+        key = normalise_ref(ref_no)
+        if not key:
+            return None
+        i = bisect.bisect_left(Strings(self.sorted_keys), key)
+        if i < len(self.sorted_keys) and self.sorted_keys[i].as_py() == key:
+            return int(self.order[i])
+        return None
+
+    def row(self, pos):
+        return Row(self, pos)
+
+    def lookup(self, ref_no):
+        pos = self.position(ref_no)
+        if pos is None:
+            return None
+        return self.row(pos)
+
+    def rows_by_key(self, columns=None):
+        """Map of normalised Ref No. to the row's values in `columns` (default all)."""
+        columns = self.columns if columns is None else columns
+        values = zip(*(self.table.column(c).to_pylist() for c in columns))
+        return dict(zip(self.keys.to_pylist(), values))
+
+
+def diff_catalogues(old, new):
+    """Return `(added, removed, changed)` sets of normalised Ref Nos. between two versions.
+
+    A row only counts as changed when its name or description does, since those
+    are all a report is generated from; price and other columns don't matter.
+    """
+    prompt_cols = (ITEM_COL, DESC_COL)
+    old_rows, new_rows = old.rows_by_key(prompt_cols), new.rows_by_key(prompt_cols)
+    changed = {k for k in old_rows.keys() & new_rows.keys() if old_rows[k] != new_rows[k]}
+    return new_rows.keys() - old_rows.keys(), old_rows.keys() - new_rows.keys(), changed
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def artifact_path(source):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(CACHE_DIR, f"{stem}.arrow")
+
+
+def _source_batches(path):
+    with open(path, "rb") as f:
+        yield from iter_batches(iter_records(f))
+
+
+def parse_source(path):
+    """Compile `path` into an in-memory Arrow table."""
+    batches = list(_source_batches(path))
+    if not batches:
+        raise ValueError("Could not parse the document. Check its format.")
+    return pa.Table.from_batches([_widen(b, batches[-1].schema) for b in batches])
+
+
+def build_artifact(source, dest=None, source_hash=None):
+    """Compile `source` (docx/csv/xlsx) into an Arrow IPC file and return its path.
+
+    Rows are written batch by batch as they are parsed, so memory use does not
+    grow with the size of the guide.
+    """
+    dest = dest or artifact_path(source)
+    meta = {
+        b"source_name": os.path.basename(source).encode(),
+        b"source_sha256": (source_hash or file_sha256(source)).encode(),
+        b"artifact_version": ARTIFACT_VERSION.encode(),
+    }
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    sink = writer = schema = None
+    try:
+        for batch in _source_batches(source):
+            if schema is None or not batch.schema.equals(schema):
+                if writer is not None:
+                    # A table brought new columns: copy what was written into a wider file
+                    writer.close()
+                    sink.close()
+                    os.replace(tmp, f"{tmp}.narrow")
+                schema = batch.schema
+                sink = pa.OSFile(tmp, "wb")
+                writer = pa.ipc.new_file(sink, schema.with_metadata(meta))
+                if os.path.exists(f"{tmp}.narrow"):
+                    with pa.memory_map(f"{tmp}.narrow", "r") as narrow:
+                        reader = pa.ipc.open_file(narrow)
+                        for i in range(reader.num_record_batches):
+                            writer.write_batch(_widen(reader.get_batch(i), schema))
+                    os.remove(f"{tmp}.narrow")
+            writer.write_batch(batch)
+        if writer is None:
+            raise ValueError("Could not parse the document. Check its format.")
+        writer.close()
+        sink.close()
+    except BaseException:
+        if sink is not None:
+            sink.close()
+        for path in (tmp, f"{tmp}.narrow"):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    os.replace(tmp, dest)
+    return dest
+
+
+def load_artifact(dest):
+    # Memory-mapped: column buffers are paged in from the file, not copied
+    with pa.memory_map(dest, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table
+
+
+def _artifact_matches(dest, source_hash):
+    try:
+        with pa.memory_map(dest, "r") as source:
+            meta = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return (meta.get(b"source_sha256", b"").decode() == source_hash
+            and meta.get(b"artifact_version", b"").decode() == ARTIFACT_VERSION)
+
+
+def open_catalogue(path):
+    """Load the compiled artifact for `path`, rebuilding it if missing or stale."""
+    dest = artifact_path(path)
+    source_hash = file_sha256(path)
+    if not _artifact_matches(dest, source_hash):
+        try:
+            build_artifact(path, dest, source_hash)
+        except OSError:
+            # Read-only cache dir: fall back to an in-memory compile
+            return Catalogue(parse_source(path))
+    return Catalogue(load_artifact(dest))
+
+
+def _signature(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+_lock = threading.Lock()
+_cache = {}
+_bytes_cache = {}
+_watched = set()
+
+
+def read_source_bytes(path=DEFAULT_PATH):
+    """The raw code guide, read once per file version and shared by every session.
+
+    Used for both the sidebar download and parsing; callers must not mutate it.
+    """
+    sig = _signature(path)
+    cached = _bytes_cache.get(sig[0])
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    with open(path, "rb") as f:
+        data = f.read()
+    _bytes_cache[sig[0]] = (sig, data)
+    return data
+
+
+def get_catalogue(path=DEFAULT_PATH):
+    """Return the catalogue for `path`, loading it at most once per file version.
+
+    The result is shared by every caller in the process (all Streamlit sessions
+    included) and is reloaded only when the file's mtime or size changes. A
+    path being watched (see `at_lookup.reload`) keeps serving its current
+    version until the watcher swaps in the rebuilt one.
+    """
+    sig = _signature(path)
+    cached = _cache.get(sig[0])
+    if cached is not None and (cached[0] == sig or sig[0] in _watched):
+        return cached[1]
+    with _lock:
+        cached = _cache.get(sig[0])
+        if cached is not None and (cached[0] == sig or sig[0] in _watched):
+            return cached[1]
+        catalogue = open_catalogue(path)
+        _cache[sig[0]] = (sig, catalogue)
+        return catalogue
+
+
+def current_version(path):
+    """`(signature, catalogue)` last installed for `path`, or None if never loaded."""
+    return _cache.get(os.path.abspath(path))
+
+
+def install_catalogue(path, sig, catalogue):
+    """Make `catalogue` the version every later `get_catalogue(path)` call returns."""
+    with _lock:
+        _cache[sig[0]] = (sig, catalogue)
+
+
+def set_watched(path, watched=True):
+    with _lock:
+        if watched:
+            _watched.add(os.path.abspath(path))
+        else:
+            _watched.discard(os.path.abspath(path))
@@ -0,0 +1,165 @@
+"""Single-flight coalescing of identical concurrent completions.
+
+When several sessions ask for the same (model, prompt) at once, only the first
+sends a request; the others wait for and share its result. A stream is drained
+by a background thread into a shared buffer, so every subscriber, however late
+it joins, replays the text from the start and then follows live, and a slow
+reader never holds back the others. If every subscriber goes away the upstream
+stream is dropped.
+"""
+import threading
+
+from at_lookup.metrics import registry
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Broadcast:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks = []
+        self.usage = None
+        self.finish_reason = None
+        self.error = None
+        self.done = False
+        self.subscribers = 0
+
+
+class Subscription:
+    """Iterator over one shared stream; `joined` is True if another caller started it.
+
+    `finish_reason` is the upstream's reason for ending, once the stream is done.
+    """
+
+    def __init__(self, flights, broadcast, joined, on_usage=None):
+        self.joined = joined
+        self._flights = flights
+        self._broadcast = broadcast
+        self._on_usage = on_usage
+        self._pos = 0
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        b = self._broadcast
+        with b.cond:
+            while self._pos >= len(b.chunks) and not b.done:
+                b.cond.wait()
+            if self._pos < len(b.chunks):
+                self._pos += 1
+                return b.chunks[self._pos - 1]
+        if not self._closed and b.error is None and b.usage is not None and self._on_usage:
+            self._on_usage(b.usage)
+        self.close()
+        if b.error is not None:
+            raise b.error
+        raise StopIteration
+
+    @property
+    def finish_reason(self):
+        return self._broadcast.finish_reason
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._flights._unsubscribe(self._broadcast)
+
+    def __del__(self):
+        self.close()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Call `fn` once for all concurrent callers with `key`; returns `(result, shared)`."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            registry.inc("at_llm_coalesced_total", kind="complete",
+                         help="Completions served by joining an identical in-flight request")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stream(self, key, open_stream, on_usage=None):
+        """Subscribe to the stream for `key`, starting it if needed.
+
+        The stream is opened as `open_stream(record_usage, record_finish)`.
+
+        Only the subscriber that started the stream has `on_usage` called, so
+        token counts reflect what was actually spent.
+        """
+        with self._lock:
+            b = self._streams.get(key)
+            joined = b is not None
+            if not joined:
+                b = self._streams[key] = _Broadcast()
+            b.subscribers += 1
+        if joined:
+            registry.inc("at_llm_coalesced_total", kind="stream",
+                         help="Completions served by joining an identical in-flight request")
+        else:
+            threading.Thread(target=self._produce, args=(key, b, open_stream),
+                             name="coalesced-stream", daemon=True).start()
+        return Subscription(self, b, joined, None if joined else on_usage)
+
+    def _produce(self, key, b, open_stream):
+        def record_usage(usage):
+            b.usage = usage
+
+        def record_finish(reason):
+            b.finish_reason = reason
+
+        chunks = None
+        try:
+            chunks = open_stream(record_usage, record_finish)
+            for chunk in chunks:
+                with b.cond:
+                    b.chunks.append(chunk)
+                    b.cond.notify_all()
+                with self._lock:
+                    if b.subscribers == 0:
+                        # Nobody is listening and nobody can join any more
+                        if self._streams.get(key) is b:
+                            del self._streams[key]
+                        break
+        except BaseException as e:
+            b.error = e
+        finally:
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+            with self._lock:
+                if self._streams.get(key) is b:
+                    del self._streams[key]
+            with b.cond:
+                b.done = True
+                b.cond.notify_all()
+
+    def _unsubscribe(self, b):
+        with self._lock:
+            b.subscribers -= 1
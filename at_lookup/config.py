@@ -0,0 +1,53 @@
+"""Environment-driven settings shared across the package."""
+import os
+
+from dotenv import load_dotenv
+
+# Load local .env when running locally
+load_dotenv()
+
+# Compiled catalogues and caches live outside data/, which is mounted read-only in Docker
+CACHE_DIR = os.getenv("AT_CACHE_DIR", "cache")
+
+MODEL = os.getenv("AT_MODEL", "gpt-4o-mini")
+
+RESPONSE_CACHE_PATH = os.getenv("AT_RESPONSE_CACHE", os.path.join(CACHE_DIR, "responses.sqlite"))
+RESPONSE_CACHE_TTL = float(os.getenv("AT_RESPONSE_CACHE_TTL", 7 * 24 * 3600))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("AT_RESPONSE_CACHE_MAX_ENTRIES", 5000))
+
+# Parallel section generation: off by default; groups are "|"-separated, sections ","-separated
+PARALLEL_SECTIONS = os.getenv("AT_PARALLEL_SECTIONS", "0").lower() in ("1", "true", "yes")
+SECTION_GROUPS = os.getenv("AT_SECTION_GROUPS", "1|2|3|4|5|6")
+
+# Port for the Prometheus-style /metrics endpoint; unset disables it
+METRICS_PORT = int(os.getenv("AT_METRICS_PORT", 0)) or None
+
+# Client-side OpenAI limits shared by every session; 0 disables a bucket. They start here
+# and are corrected from the API's x-ratelimit-* response headers. Under `serve`, each of
+# the AT_WORKERS processes takes an equal share.
+RATE_LIMIT_RPM = int(os.getenv("AT_RATE_LIMIT_RPM", 500))
+RATE_LIMIT_TPM = int(os.getenv("AT_RATE_LIMIT_TPM", 200_000))
+MAX_CONCURRENCY = int(os.getenv("AT_MAX_CONCURRENCY", 8))
+
+# Token budgets: AT_MAX_TOKENS caps a request's output, AT_SECTION_MAX_TOKENS each section's
+# share of a parallel group's, AT_SECTION_WORDS asks for shorter sections (0 leaves length to
+# the model) and AT_MAX_CONTEXT_TOKENS trims pasted additional context
+MAX_TOKENS = int(os.getenv("AT_MAX_TOKENS", 4000))
+SECTION_MAX_TOKENS = int(os.getenv("AT_SECTION_MAX_TOKENS", 1200))
+SECTION_WORDS = int(os.getenv("AT_SECTION_WORDS", 0))
+MAX_CONTEXT_TOKENS = int(os.getenv("AT_MAX_CONTEXT_TOKENS", 500))
+
+# Worker processes behind `python -m at_lookup serve` (set for each worker by serve itself)
+WORKERS = max(1, int(os.getenv("AT_WORKERS", 1)))
+
+# Feedback is queued in SQLite and sent in batches by a background thread. Setting
+# AT_FEEDBACK_FILE sends it to a local JSON-lines file instead of Trubrics.
+FEEDBACK_QUEUE_PATH = os.getenv("AT_FEEDBACK_QUEUE", os.path.join(CACHE_DIR, "feedback.sqlite"))
+FEEDBACK_FILE = os.getenv("AT_FEEDBACK_FILE") or None
+FEEDBACK_BATCH_SIZE = int(os.getenv("AT_FEEDBACK_BATCH_SIZE", 20))
+FEEDBACK_FLUSH_INTERVAL = float(os.getenv("AT_FEEDBACK_FLUSH_INTERVAL", 10))
+TRUBRICS_HOST = os.getenv("AT_TRUBRICS_HOST", "https://app.trubrics.com/api/ingestion")
+
+# Seconds between checks for a replaced code guide; 0 disables the watcher, and the
+# guide is then reloaded by the first lookup after it changes
+WATCH_INTERVAL = float(os.getenv("AT_WATCH_INTERVAL", 30))
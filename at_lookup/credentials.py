@@ -0,0 +1,34 @@
+"""OpenAI and Trubrics credentials from the environment (.env) or Streamlit secrets."""
+import os
+
+MISSING_OPENAI_KEY = (
+    "🚨 Missing OpenAI API key!\n\n"
+    "Provide it in a local `.env`:\n\n"
+    "```bash\nexport OPENAI_API_KEY=\"sk-...\"\n```\n\n"
+    "or via Streamlit Secrets (TOML):\n\n"
+    "```toml\nOPENAI_API_KEY = \"sk-...\"\n[openai]\napi_key = \"sk-...\"\nproject_id = \"...\"\n```"
+)
+
+
+def openai_credentials(secrets=None):
+    """Return `(api_key, project_id)`; environment variables win over `secrets`."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    project_id = os.getenv("OPENAI_PROJECT_ID")
+    # Reading st.secrets raises when no secrets file exists
+    try:
+        if secrets is not None:
+            api_key     = api_key     or secrets.get("OPENAI_API_KEY")
+            project_id  = project_id  or secrets.get("OPENAI_PROJECT_ID")
+            if "openai" in secrets:
+                api_key     = api_key     or secrets["openai"].get("api_key")
+                project_id  = project_id  or secrets["openai"].get("project_id")
+    except Exception:
+        pass
+    return api_key, project_id
+
+
+def trubrics_api_key(secrets=None):
+    try:
+        return os.getenv("TRUBRICS_API_KEY") or (secrets.get("TRUBRICS_API_KEY") if secrets is not None else None)
+    except Exception:
+        return None
@@ -0,0 +1,220 @@
+"""User feedback, queued on disk and sent to Trubrics in the background.
+
+`save_feedback` only inserts a row into a SQLite queue, so the Streamlit
+callback returns at once whatever state Trubrics is in. A daemon thread sends
+queued events in batches to a sink and deletes them once accepted; a failed
+batch is retried with exponential backoff, and events still queued when the
+process stops are sent by the next one.
+
+Rows are leased before sending, so several workers can share one queue file
+without sending an event twice; a lease held by a process that died expires
+and the rows become due again.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from at_lookup import config
+from at_lookup.metrics import registry
+from at_lookup.response_cache import connect
+
+logger = logging.getLogger("at_lookup.feedback")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    created  REAL NOT NULL,
+    due      REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner    TEXT,
+    payload  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_due ON events (due);
+"""
+
+LEASE = 60.0
+MAX_BACKOFF = 3600.0
+
+
+class TrubricsSink:
+    """Posts a batch to the Trubrics ingestion API; raises if it is not accepted."""
+
+    def __init__(self, api_key, host=None, timeout=10):
+        self.api_key = api_key
+        self.host = host or config.TRUBRICS_HOST
+        self.timeout = timeout
+
+    def send(self, events):
+        # Only imported when feedback is actually configured
+        import requests
+
+        resp = requests.post(f"{self.host}/publish_events", json=events, timeout=self.timeout,
+                             headers={"x-api-key": self.api_key})
+        resp.raise_for_status()
+
+
+class FileSink:
+    """Appends each event as a JSON line; a stand-in for Trubrics in tests and local runs."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def make_sink(api_key=None):
+    """The configured sink: a file if AT_FEEDBACK_FILE is set, else Trubrics, else None."""
+    if config.FEEDBACK_FILE:
+        return FileSink(config.FEEDBACK_FILE)
+    if api_key:
+        return TrubricsSink(api_key)
+    return None
+
+
+class FeedbackQueue:
+    def __init__(self, sink, path=None, batch_size=None, interval=None):
+        self.sink = sink
+        self.path = path or config.FEEDBACK_QUEUE_PATH
+        self.batch_size = batch_size or config.FEEDBACK_BATCH_SIZE
+        self.interval = config.FEEDBACK_FLUSH_INTERVAL if interval is None else interval
+        self.owner = uuid.uuid4().hex
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._conn = connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="feedback-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush()
+
+    def put(self, user_id, event, properties=None):
+        payload = {"user_id": user_id, "event": event, "properties": properties,
+                   "timestamp": datetime.now(timezone.utc).isoformat()}
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO events (created, due, payload) VALUES (?, ?, ?)",
+                               (now, now, json.dumps(payload)))
+        self._wake.set()
+
+    def _claim(self):
+        now = time.time()
+        with self._lock, self._conn:
+            # The UPDATE takes SQLite's write lock, so no other worker can claim the same rows
+            self._conn.execute(
+                "UPDATE events SET owner = ?, due = ?, attempts = attempts + 1 WHERE id IN ("
+                " SELECT id FROM events WHERE due <= ? ORDER BY id LIMIT ?)",
+                (self.owner, now + LEASE, now, self.batch_size),
+            )
+            return self._conn.execute(
+                "SELECT id, attempts, payload FROM events WHERE owner = ? AND due = ? ORDER BY id",
+                (self.owner, now + LEASE),
+            ).fetchall()
+
+    def flush_batch(self):
+        """Send one batch of due events; returns how many were sent."""
+        rows = self._claim()
+        if not rows:
+            return 0
+        ids = [row[0] for row in rows]
+        try:
+            self.sink.send([json.loads(row[2]) for row in rows])
+        except Exception as e:
+            delay = min(MAX_BACKOFF, 2 ** min(max(row[1] for row in rows), 12))
+            logger.warning("Sending %d feedback events failed, retrying in %.0fs: %s",
+                           len(rows), delay, e)
+            registry.inc("at_feedback_events_total", len(rows), status="failed",
+                         help="Feedback events by delivery outcome")
+            with self._lock, self._conn:
+                due = time.time() + delay
+                self._conn.executemany("UPDATE events SET owner = NULL, due = ? WHERE id = ?",
+                                       [(due, i) for i in ids])
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM events WHERE id = ?", [(i,) for i in ids])
+        registry.inc("at_feedback_events_total", len(rows), status="sent",
+                     help="Feedback events by delivery outcome")
+        return len(rows)
+
+    def flush(self):
+        """Send every event that is due now, in batches, stopping at the first failure."""
+        sent = 0
+        while True:
+            n = self.flush_batch()
+            if not n:
+                return sent
+            sent += n
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Feedback flush failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            # Gather events submitted close together into one batch
+            self._stop.wait(min(1.0, self.interval))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_feedback_queue(api_key=None):
+    """Process-wide queue with its flush thread running, or None if no sink is configured."""
+    global _instance
+    if _instance is None:
+        sink = make_sink(api_key)
+        if sink is None:
+            return None
+        with _instance_lock:
+            if _instance is None:
+                _instance = FeedbackQueue(sink).start()
+    return _instance
+
+
+def feedback_properties(resp):
+    return {
+        "score": resp.get("score"),
+        "text": resp.get("text", ""),
+        "feedback_type": "faces",
+        "timestamp": time.time()
+    }
+
+
+def save_feedback(queue, resp):
+    """Queue a streamlit-feedback response as an `app_feedback` event."""
+    queue.put(
+        user_id="anonymous",
+        event="app_feedback",
+        properties=feedback_properties(resp)
+    )
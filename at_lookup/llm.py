@@ -0,0 +1,216 @@
+"""OpenAI calls that generate the market analysis.
+
+The openai package takes most of a second to import, so it is only imported
+once a client is actually needed.
+"""
+import functools
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from at_lookup import config
+from at_lookup.coalesce import SingleFlight
+from at_lookup.prompt import build_system_prompt
+from at_lookup.ratelimit import get_rate_limiter
+from at_lookup.sections import SECTION_COUNT
+from at_lookup.tokens import count_prompt_tokens
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors():
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+
+
+# Identical concurrent requests from any session share one upstream call
+_flights = SingleFlight()
+
+
+def _observe_response(response):
+    get_rate_limiter().observe(response.status_code, response.headers)
+
+
+def make_client(api_key=None, project_id=None):
+    from openai import DefaultHttpxClient, OpenAI
+
+    # Retries go through with_retries so that every attempt passes the rate limiter
+    return OpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        project=project_id or os.getenv("OPENAI_PROJECT_ID"),
+        max_retries=0,
+        http_client=DefaultHttpxClient(event_hooks={"response": [_observe_response]}),
+    )
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def with_retries(fn, *args, attempts=5, base_delay=1.0, max_delay=60.0, **kwargs):
+    """Call `fn`, retrying rate limits and transient failures with jittered backoff.
+
+    A server-supplied Retry-After header takes precedence over the backoff.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except retryable_errors() as e:
+            if attempt == attempts - 1:
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            time.sleep(delay)
+
+
+def _total_tokens(usage):
+    return getattr(usage, "total_tokens", None)
+
+
+def _limited_create(client, estimate, **kwargs):
+    """Wait for the shared rate limiter, then send; the caller releases on success."""
+    limiter = get_rate_limiter()
+    limiter.acquire(estimate)
+    try:
+        return client.chat.completions.create(**kwargs)
+    except BaseException:
+        limiter.release(estimate)
+        raise
+
+
+def _messages(system_prompt, user_prompt):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user",   "content": user_prompt}
+    ]
+
+
+def _budget(model, system_prompt, user_prompt, max_tokens):
+    # Counted before sending; the response's usage corrects it on release
+    return count_prompt_tokens(system_prompt, user_prompt, model) + max_tokens
+
+
+def is_cacheable(text, finish_reason):
+    """False for an empty answer or one cut off at the output cap; neither may be cached."""
+    return bool(text and text.strip()) and finish_reason != "length"
+
+
+def complete(client, model, system_prompt, user_prompt, on_usage=None, max_tokens=None,
+             on_finish=None):
+    max_tokens = max_tokens or config.MAX_TOKENS
+    estimate = _budget(model, system_prompt, user_prompt, max_tokens)
+
+    def create():
+        resp = _limited_create(client, estimate, model=model,
+                               messages=_messages(system_prompt, user_prompt),
+                               max_completion_tokens=max_tokens)
+        get_rate_limiter().release(estimate, _total_tokens(resp.usage))
+        return resp
+
+    resp, shared = _flights.do((model, system_prompt, user_prompt, max_tokens), create)
+    if on_usage is not None and not shared:
+        on_usage(resp.usage)
+    if on_finish is not None:
+        on_finish(resp.choices[0].finish_reason)
+    return resp.choices[0].message.content
+
+
+def _stream_chunks(client, model, system_prompt, user_prompt, max_tokens, on_usage, on_finish):
+    estimate = _budget(model, system_prompt, user_prompt, max_tokens)
+    # Nothing has been shown yet, so a rejected request can safely be retried
+    stream = with_retries(_limited_create, client, estimate, model=model,
+                          messages=_messages(system_prompt, user_prompt),
+                          max_completion_tokens=max_tokens,
+                          stream=True, stream_options={"include_usage": True})
+    used = None
+    try:
+        with stream:
+            for chunk in stream:
+                # The usage-only chunk arrives last, with no choices
+                if getattr(chunk, "usage", None) is not None:
+                    used = _total_tokens(chunk.usage)
+                    on_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].finish_reason:
+                    on_finish(chunk.choices[0].finish_reason)
+                if chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    finally:
+        get_rate_limiter().release(estimate, used)
+
+
+def stream_text(client, model, system_prompt, user_prompt, on_usage=None, max_tokens=None):
+    """Iterate over the completion's text deltas as they arrive.
+
+    Concurrent identical requests share one upstream stream; the returned
+    iterator's `joined` attribute says whether this call joined another's, and
+    its `finish_reason` is set once the stream ends ("length" if it was cut off).
+    """
+    max_tokens = max_tokens or config.MAX_TOKENS
+    return _flights.stream(
+        (model, system_prompt, user_prompt, max_tokens),
+        lambda record, finish: _stream_chunks(client, model, system_prompt, user_prompt,
+                                              max_tokens, record, finish),
+        on_usage,
+    )
+
+
+def parse_groups(spec):
+    """Parse a grouping such as "1,2|3|4|5,6" into tuples of section numbers."""
+    groups = [tuple(int(n) for n in part.split(",") if n.strip())
+              for part in spec.split("|") if part.strip()]
+    seen = sorted(n for g in groups for n in g)
+    if seen != list(range(1, SECTION_COUNT + 1)):
+        raise ValueError(f"Section groups must cover 1-{SECTION_COUNT} exactly once: {spec!r}")
+    return groups
+
+
+def group_max_tokens(group):
+    """A section group's output cap: AT_SECTION_MAX_TOKENS per section, at most AT_MAX_TOKENS."""
+    return min(config.MAX_TOKENS, config.SECTION_MAX_TOKENS * len(group))
+
+
+def _complete_group(client, model, group, user_prompt, on_usage):
+    finish = []
+    text = with_retries(complete, client, model, build_system_prompt(group), user_prompt,
+                        on_usage=on_usage, max_tokens=group_max_tokens(group),
+                        on_finish=finish.append)
+    return text, finish[-1] if finish else None
+
+
+def generate_groups(client, model, user_prompt, groups, on_usage=None):
+    """Request each section group concurrently.
+
+    Yields `(group, text, finish_reason)` as each finishes.
+    """
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        futures = {pool.submit(_complete_group, client, model, g, user_prompt, on_usage): g
+                   for g in groups}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+
+
+def assemble_report(results, groups):
+    """Join per-group outputs, in section order, into one ===SECTION N=== report."""
+    parts = []
+    for group in groups:
+        text = results.get(group) or ""
+        # A single-section answer that dropped its marker is still unambiguous
+        if len(group) == 1 and f"===SECTION {group[0]}===" not in text:
+            text = f"===SECTION {group[0]}===\n{text}"
+        parts.append(text.strip())
+    return "\n\n".join(parts)
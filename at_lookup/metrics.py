@@ -0,0 +1,199 @@
+"""Per-request phase timings, token usage and cache outcome for every analysis.
+
+Each `RequestTrace` is logged as one JSON line on the `at_lookup.metrics`
+logger when it finishes and folded into a process-wide registry that is
+exposed in the Prometheus text format by `start_metrics_server`.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("at_lookup.metrics")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}     # (name, labels) -> value
+        self._histograms = {}   # (name, labels) -> [bucket counts..., sum, count]
+        self._help = {}
+
+    def inc(self, name, value=1, help="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, ("counter", help))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, help="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help))
+            hist = self._histograms.setdefault(key, [0] * len(BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help) in sorted(self._help.items()):
+                if help:
+                    lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (n, labels), value in sorted(self._counters.items()):
+                        if n == name:
+                            lines.append(f"{name}{_labels(dict(labels))} {value}")
+                    continue
+                for (n, labels), hist in sorted(self._histograms.items()):
+                    if n != name:
+                        continue
+                    labels = dict(labels)
+                    for bound, count in zip(BUCKETS, hist):
+                        lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {hist[-1]}")
+                    lines.append(f"{name}_sum{_labels(labels)} {hist[-2]}")
+                    lines.append(f"{name}_count{_labels(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestTrace:
+    """Timings and attributes for one lookup → prompt → completion → render request."""
+
+    def __init__(self, source, **attrs):
+        self.source = source
+        self.attrs = {"model": None, "mode": None, "cache": None, **attrs}
+        self.phases = {}
+        self.usage = {}
+        self._usage_lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._finished = False
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def mark(self, name):
+        """Record time elapsed since the trace began, e.g. time to first token."""
+        self.phases.setdefault(name, time.perf_counter() - self._start)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def record_usage(self, usage):
+        if usage is None:
+            return
+        # Parallel section requests report usage from worker threads
+        with self._usage_lock:
+            for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                value = getattr(usage, kind, None)
+                if value is not None:
+                    self.usage[kind] = self.usage.get(kind, 0) + value
+
+    def finish(self, status="ok"):
+        if self._finished:
+            return
+        self._finished = True
+        total = time.perf_counter() - self._start
+        attrs = {k: v for k, v in self.attrs.items() if v is not None}
+        record = {
+            "event": "analysis_request",
+            "source": self.source,
+            "status": status,
+            "total_s": round(total, 6),
+            "phases_s": {k: round(v, 6) for k, v in self.phases.items()},
+            "usage": self.usage,
+            **attrs,
+        }
+        _ensure_handler()
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+        common = {"source": self.source, "model": attrs.get("model", ""),
+                  "mode": attrs.get("mode", "")}
+        registry.inc("at_analysis_requests_total", help="Analysis requests by outcome",
+                     status=status, cache=attrs.get("cache", ""), **common)
+        registry.observe("at_analysis_request_seconds", total,
+                         help="End-to-end analysis request latency", **common)
+        for name, seconds in self.phases.items():
+            registry.observe("at_analysis_phase_seconds", seconds,
+                             help="Latency of each analysis phase", phase=name, **common)
+        for kind, count in self.usage.items():
+            registry.inc("at_llm_tokens_total", count, help="Tokens reported by the API",
+                         kind=kind.replace("_tokens", ""), model=attrs.get("model", ""))
+
+
+_handler_lock = threading.Lock()
+
+
+def _ensure_handler():
+    # Streamlit configures its own loggers; give ours a plain JSON-lines handler
+    if logger.handlers:
+        return
+    with _handler_lock:
+        if logger.handlers:
+            return
+        path = os.getenv("AT_METRICS_LOG")
+        handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """Serve /metrics from a daemon thread; safe to call on every Streamlit rerun."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                logger.warning("metrics endpoint not started on port %s: %s", port, e)
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server",
+                             daemon=True).start()
+    return _server or None
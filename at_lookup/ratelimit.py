@@ -0,0 +1,152 @@
+"""Process-wide client-side rate limiting for OpenAI requests.
+
+Every request first waits for a concurrency slot, then for room in two token
+buckets: requests per minute and tokens per minute. Buckets start from the
+configured limits and are corrected from the `x-ratelimit-*` headers on every
+response, so they track what the API actually allows for the key.
+
+The concurrency limit adapts to those responses: it grows by one slot per
+"window" of successful requests and halves on a 429, which also pauses new
+requests until the Retry-After time has passed.
+"""
+import re
+import threading
+import time
+
+from at_lookup import config
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """Parse a Retry-After value or a duration such as "1s", "6m0s" or "20ms" into seconds."""
+    if value is None:
+        return None
+    matches = _DURATION.findall(value)
+    if not matches:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(n) * _UNITS[unit] for n, unit in matches)
+
+
+def _int_header(headers, name):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second up to `per_minute`."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        rate = self.capacity / 60.0
+        self.level = min(self.capacity, self.level + (now - self._updated) * rate)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill(now)
+        # A single request larger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.capacity / 60.0)
+
+    def take(self, amount):
+        self.level -= amount
+
+    def sync(self, limit, remaining, now):
+        """Adopt the server's view: its limit, and no more than it says is left."""
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """`share` is this process's fraction of the account limits when several workers run."""
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=None, min_concurrency=1, share=1.0):
+        self.share = share
+        self.requests = TokenBucket(rpm * share) if rpm else None
+        self.tokens = TokenBucket(tpm * share) if tpm else None
+        self.max_concurrency = max(1, round((max_concurrency or config.MAX_CONCURRENCY) * share))
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens=0):
+        """Block until a request estimated at `tokens` may be sent."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                waits = [self._paused_until - now]
+                if self.in_flight >= int(self.concurrency):
+                    self._cond.wait()
+                    continue
+                if self.requests is not None:
+                    waits.append(self.requests.wait_time(1, now))
+                if self.tokens is not None:
+                    waits.append(self.tokens.wait_time(tokens, now))
+                delay = max(waits)
+                if delay <= 0:
+                    break
+                self._cond.wait(delay)
+            self.in_flight += 1
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+
+    def release(self, estimated=0, used=None):
+        """Free the slot; `used` tokens (from the response) correct the estimate."""
+        with self._cond:
+            self.in_flight -= 1
+            if self.tokens is not None and used is not None:
+                self.tokens.take(used - estimated)
+            self._cond.notify_all()
+
+    def observe(self, status, headers):
+        """Adapt limits to one API response (including retried and failed ones)."""
+        now = time.monotonic()
+        with self._cond:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                if bucket is not None:
+                    limit = _int_header(headers, f"x-ratelimit-limit-{kind}")
+                    bucket.sync(limit and limit * self.share,
+                                _int_header(headers, f"x-ratelimit-remaining-{kind}"), now)
+            if status == 429:
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                retry_after = parse_duration(headers.get("retry-after")) or 1.0
+                self._paused_until = max(self._paused_until, now + retry_after)
+            elif status < 400:
+                self.concurrency = min(self.max_concurrency,
+                                       self.concurrency + 1 / max(1.0, self.concurrency))
+            self._cond.notify_all()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The limiter shared by every session and worker thread in this process."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(config.RATE_LIMIT_RPM, config.RATE_LIMIT_TPM,
+                                       config.MAX_CONCURRENCY, share=1 / config.WORKERS)
+    return _limiter
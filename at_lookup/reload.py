@@ -0,0 +1,119 @@
+"""Pick up a replaced code guide without a restart.
+
+A watcher thread polls the file's mtime and size. When they change (and stay
+put for a moment, so a half-copied file is not parsed), the new version is
+compiled and its search index built off the request path. It is then swapped
+in with one dict assignment: requests already holding the old catalogue
+finish with it, and later ones get the new one. Only rows whose Ref No.
+disappeared or whose name or description changed lose their cached and
+precomputed analyses; a price update leaves them alone.
+"""
+import logging
+import os
+import threading
+import time
+
+from at_lookup import config
+from at_lookup.catalogue import (_signature, current_version, diff_catalogues,
+                                 install_catalogue, open_catalogue, set_watched)
+from at_lookup.metrics import registry
+from at_lookup.search import get_search_index
+
+logger = logging.getLogger("at_lookup.reload")
+
+
+def reload_catalogue(path, cache=None):
+    """Rebuild `path` if it changed, swap it in and invalidate analyses of changed rows.
+
+    Returns `(added, removed, changed)` sets of normalised Ref Nos., or None if
+    the installed version is already current.
+    """
+    sig = _signature(path)
+    current = current_version(path)
+    if current is not None and current[0] == sig:
+        return None
+    catalogue = open_catalogue(path)
+    get_search_index(catalogue)
+    if current is None:
+        install_catalogue(path, sig, catalogue)
+        return set(catalogue.keys.to_pylist()), set(), set()
+    added, removed, changed = diff_catalogues(current[1], catalogue)
+    install_catalogue(path, sig, catalogue)
+    stale = removed | changed
+    if cache is not None and stale:
+        cache.invalidate_refs(stale)
+        cache.delete_precomputed(stale)
+    registry.inc("at_catalogue_reloads_total", help="Code guide versions swapped in")
+    logger.info("Reloaded %s: %d rows, %d added, %d removed, %d changed",
+                path, len(catalogue), len(added), len(removed), len(changed))
+    return added, removed, changed
+
+
+class CatalogueWatcher:
+    def __init__(self, path, cache=None, interval=None, settle=1.0):
+        self.path = path
+        self.cache = cache
+        self.interval = config.WATCH_INTERVAL if interval is None else interval
+        self.settle = settle
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Reload if the file changed and has stopped changing; see `reload_catalogue`."""
+        try:
+            sig = _signature(self.path)
+        except OSError:
+            # Being replaced; try again on the next poll
+            return None
+        current = current_version(self.path)
+        if (current is not None and current[0] == sig) or sig == self._failed:
+            return None
+        time.sleep(self.settle)
+        try:
+            if _signature(self.path) != sig:
+                return None
+            return reload_catalogue(self.path, self.cache)
+        except Exception:
+            # Keep serving the previous version; retry only once the file changes again
+            self._failed = sig
+            logger.exception("Could not reload %s", self.path)
+            return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None:
+            set_watched(self.path)
+            self._thread = threading.Thread(target=self._run, name="catalogue-watcher",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        set_watched(self.path, False)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def watch_catalogue(path, cache=None, interval=None):
+    """Start one watcher per file for the process; safe to call on every Streamlit rerun.
+
+    Returns None when watching is disabled (AT_WATCH_INTERVAL=0).
+    """
+    interval = config.WATCH_INTERVAL if interval is None else interval
+    if not interval:
+        return None
+    key = os.path.abspath(path)
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = CatalogueWatcher(path, cache, interval).start()
+        return _watchers[key]
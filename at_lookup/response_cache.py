@@ -0,0 +1,148 @@
+"""Persistent LLM response cache backed by SQLite, with a TTL and an LRU size cap.
+
+Precomputed default reports (see `at_lookup.warm`) live in a second table that
+is exempt from expiry and eviction; `get` falls back to it transparently.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from at_lookup import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key            TEXT PRIMARY KEY,
+    ref_key        TEXT,
+    model          TEXT,
+    prompt_version TEXT,
+    created        REAL NOT NULL,
+    accessed       REAL NOT NULL,
+    response       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS responses_ref_key ON responses (ref_key);
+CREATE TABLE IF NOT EXISTS precomputed (
+    ref_key  TEXT PRIMARY KEY,
+    key      TEXT NOT NULL,
+    created  REAL NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS precomputed_key ON precomputed (key);
+"""
+
+
+def connect(path, attempts=50):
+    """Open a SQLite database in WAL mode, as shared by every worker process.
+
+    Switching the journal mode does not wait on the busy timeout, so workers
+    starting together on a new file can see "database is locked"; retry that.
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    for attempt in range(attempts):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return conn
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or attempt == attempts - 1:
+                conn.close()
+                raise
+            time.sleep(0.05)
+
+
+def make_key(system_prompt, user_prompt, model, prompt_version=""):
+    payload = json.dumps([prompt_version, model, system_prompt, user_prompt])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        self.path = path or config.RESPONSE_CACHE_PATH
+        self.ttl = config.RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.max_entries = config.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl and row[1] + self.ttl < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT response FROM precomputed WHERE key = ?", (key,)
+                ).fetchone()
+                return row[0] if row else None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key, response, ref_key=None, model=None, prompt_version=None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, ref_key, model, prompt_version, now, now, response),
+            )
+            if self.max_entries:
+                # Evict least recently used entries beyond the cap
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def invalidate(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def invalidate_refs(self, ref_keys):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM responses WHERE ref_key = ?", [(k,) for k in ref_keys]
+            )
+
+    def put_precomputed(self, ref_key, key, response):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO precomputed VALUES (?, ?, ?, ?)",
+                (ref_key, key, time.time(), response),
+            )
+
+    def precomputed_keys(self):
+        """Map of ref_key to the prompt key its precomputed report was generated for."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT ref_key, key FROM precomputed"))
+
+    def delete_precomputed(self, ref_keys):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM precomputed WHERE ref_key = ?", [(k,) for k in ref_keys]
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Process-wide cache shared by all Streamlit sessions."""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = ResponseCache()
+    return _instance
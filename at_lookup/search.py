@@ -0,0 +1,175 @@
+"""Ranked full-text search over Support Item names and descriptions.
+
+A BM25 inverted index over "Support Item" (weighted double) and "Description",
+with two fallbacks for the way people actually type into a search box: the last
+word is prefix-expanded so results appear mid-word, and words that are not in
+the vocabulary are matched to near spellings through a trigram index. Queries
+that look like a Ref No. fragment match on the normalised Ref No. instead.
+"""
+import bisect
+import math
+import re
+import threading
+import weakref
+from collections import Counter, defaultdict
+
+import numpy as np
+import pyarrow.compute as pc
+
+from at_lookup.catalogue import DESC_COL, ITEM_COL, REF_COL, Strings, normalise_ref
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_REF_LIKE = re.compile(r"^[0-9_ ]{3,}$")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the this to with".split()
+)
+
+ITEM_WEIGHT = 2
+K1 = 1.2
+B = 0.75
+MAX_PREFIX_EXPANSIONS = 10
+MIN_TRIGRAM_SIMILARITY = 0.35
+
+
+def tokenize(text):
+    tokens = []
+    for tok in _TOKEN.findall(text.lower()):
+        if tok in _STOPWORDS:
+            continue
+        # Crude plural folding so "commodes" finds "commode"
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+def _trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, catalogue):
+        # Results are read from the catalogue's columns; holding them rather than the
+        # catalogue lets the weakly keyed index cache drop both together
+        self.refs = catalogue.table.column(REF_COL)
+        self.items = catalogue.table.column(ITEM_COL)
+        self.ref_order = catalogue.order
+        self.sorted_keys = catalogue.sorted_keys
+
+        self.postings = defaultdict(list)   # term -> [(doc, weighted tf)]
+        lengths = []
+        items = self.items.to_pylist()
+        descs = catalogue.table.column(DESC_COL).to_pylist()
+        for doc, (item, desc) in enumerate(zip(items, descs)):
+            tf = Counter()
+            for tok in tokenize(item):
+                tf[tok] += ITEM_WEIGHT
+            for tok in tokenize(desc):
+                tf[tok] += 1
+            for term, count in tf.items():
+                self.postings[term].append((doc, count))
+            lengths.append(sum(tf.values()))
+        del items, descs
+
+        n = max(len(lengths), 1)
+        avg = (sum(lengths) / n) or 1.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+        self.norm = [K1 * (1 - B + B * length / avg) for length in lengths]
+
+        self.vocab = sorted(self.postings)
+        self.trigram_index = defaultdict(set)
+        for term in self.vocab:
+            for tri in _trigrams(term):
+                self.trigram_index[tri].add(term)
+
+    def _prefix_terms(self, prefix):
+        start = bisect.bisect_left(self.vocab, prefix)
+        terms = []
+        for term in self.vocab[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _similar_terms(self, term):
+        grams = _trigrams(term)
+        overlap = Counter()
+        for tri in grams:
+            overlap.update(self.trigram_index.get(tri, ()))
+        similar = []
+        for cand, common in overlap.most_common(20):
+            sim = common / len(grams | _trigrams(cand))
+            if sim >= MIN_TRIGRAM_SIMILARITY:
+                similar.append((cand, sim))
+        return similar[:3]
+
+    def _expand(self, tokens):
+        """Query terms with weights: exact, then prefix (last word), then fuzzy."""
+        weighted = {}
+        for i, tok in enumerate(tokens):
+            expansions = [(tok, 1.0)] if tok in self.postings else []
+            if i == len(tokens) - 1:
+                expansions += [(t, 0.8) for t in self._prefix_terms(tok) if t != tok]
+            if not expansions:
+                expansions = [(t, 0.7 * sim) for t, sim in self._similar_terms(tok)]
+            for term, weight in expansions:
+                weighted[term] = max(weighted.get(term, 0.0), weight)
+        return weighted
+
+    def _search_refs(self, query, k):
+        key = normalise_ref(query).replace(" ", "")
+        sorted_keys = Strings(self.sorted_keys)
+        start = bisect.bisect_left(sorted_keys, key)
+        hits = []
+        for pos in range(start, min(start + k, len(sorted_keys))):
+            if not sorted_keys[pos].startswith(key):
+                break
+            hits.append(int(self.ref_order[pos]))
+        if len(hits) < k:
+            seen = set(hits)
+            contains = pc.match_substring(self.sorted_keys, key).to_numpy(zero_copy_only=False)
+            for pos in np.flatnonzero(contains):
+                if len(hits) >= k:
+                    break
+                doc = int(self.ref_order[pos])
+                if doc not in seen:
+                    hits.append(doc)
+        return [self._hit(doc, 1.0) for doc in hits]
+
+    def _hit(self, doc, score):
+        return self.refs[doc].as_py(), self.items[doc].as_py(), score
+
+    def search(self, query, k=10):
+        """Return up to `k` `(ref_no, support_item, score)` tuples, best first."""
+        query = query.strip()
+        if not query:
+            return []
+        if _REF_LIKE.match(query):
+            return self._search_refs(query, k)
+
+        scores = defaultdict(float)
+        for term, weight in self._expand(tokenize(query)).items():
+            idf = self.idf[term] * weight
+            for doc, tf in self.postings[term]:
+                scores[doc] += idf * tf * (K1 + 1) / (tf + self.norm[doc])
+        best = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+        return [self._hit(doc, score) for doc, score in best]
+
+
+_lock = threading.Lock()
+_indexes = weakref.WeakKeyDictionary()
+
+
+def get_search_index(catalogue):
+    """Build the index once per catalogue object; it is dropped with the catalogue."""
+    index = _indexes.get(catalogue)
+    if index is None:
+        with _lock:
+            index = _indexes.get(catalogue)
+            if index is None:
+                index = _indexes[catalogue] = SearchIndex(catalogue)
+    return index
@@ -0,0 +1,75 @@
+"""Splitting a market-analysis report on its ===SECTION N=== markers."""
+import re
+
+TAB_LABELS = [
+    "1. Core Function",
+    "2. Device Types",
+    "3. Features",
+    "4. Innovations",
+    "5. Questions",
+    "6. Sources"
+]
+SECTION_COUNT = len(TAB_LABELS)
+NO_CONTENT = "No content returned."
+
+_MARKER = re.compile(r"^===SECTION (\d+)===\s*$", flags=re.MULTILINE)
+
+
+def parse_sections(report):
+    # Split on explicit markers
+    parts = _MARKER.split(report)
+    sections = {str(i): NO_CONTENT for i in range(1, SECTION_COUNT + 1)}
+    for idx in range(1, len(parts), 2):
+        num = parts[idx]
+        body = parts[idx+1].strip()
+        if num in sections:
+            sections[num] = body
+    return sections
+
+
+class SectionStream:
+    """Split a report into sections as its tokens arrive.
+
+    `feed()` returns the section numbers whose visible text changed, so a UI
+    only has to redraw those. A trailing partial line that could still turn
+    into a marker is held back until its newline arrives. `finish()` returns
+    exactly what `parse_sections` would for the full text.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.sections = {}
+        self._pos = 0        # start of the first line not yet consumed
+        self._current = None
+        self._bodies = {}
+
+    def feed(self, chunk):
+        self.text += chunk
+        changed = set()
+        while True:
+            end = self.text.find("\n", self._pos)
+            if end == -1:
+                break
+            line = self.text[self._pos:end]
+            self._pos = end + 1
+            m = _MARKER.match(line)
+            if m:
+                self._current = m.group(1)
+                self._bodies[self._current] = ""
+            elif self._current is not None:
+                self._bodies[self._current] += line + "\n"
+            changed.add(self._current)
+        for num in changed - {None, self._current}:
+            self.sections[num] = self._bodies[num].strip()
+        if self._current is not None:
+            tail = self.text[self._pos:]
+            if tail and not "===SECTION ".startswith(tail[:11]):
+                changed.add(self._current)
+            else:
+                tail = ""
+            self.sections[self._current] = (self._bodies[self._current] + tail).strip()
+        return {int(n) for n in changed if n is not None and self.sections.get(n)
+                and 1 <= int(n) <= SECTION_COUNT}
+
+    def finish(self):
+        return parse_sections(self.text)
@@ -0,0 +1,215 @@
+"""Semantic search: map a free-text need to likely support items without an LLM call.
+
+Each catalogue row ("Support Item. Description") is embedded offline with a
+local CPU model and stored as a normalised float32 matrix in `cache/`, which is
+memory-mapped at query time. A query is embedded the same way and ranked by
+cosine similarity with a single matrix-vector product.
+
+sentence-transformers is optional (requirements-semantic.txt). A deterministic
+feature-hashing embedder over words and character trigrams can be built with
+`--model hashing-v1` to check the pipeline offline, but it only catches wording
+overlap and near spellings, which word search already does, so it is never
+served as meaning search.
+"""
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import weakref
+
+import numpy as np
+
+from at_lookup.catalogue import DESC_COL, ITEM_COL, REF_COL
+from at_lookup.config import CACHE_DIR
+from at_lookup.search import tokenize
+
+EMBEDDING_MODEL = os.getenv("AT_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+HASHING_MODEL = "hashing-v1"
+HASHING_DIM = 1024
+
+
+def row_texts(catalogue):
+    items = catalogue.table.column(ITEM_COL).to_pylist()
+    descs = catalogue.table.column(DESC_COL).to_pylist()
+    return [f"{item.strip()}. {desc.strip()}" for item, desc in zip(items, descs)]
+
+
+@functools.lru_cache(maxsize=None)
+def model_available():
+    """Whether sentence-transformers is installed, so real embedding models can be used.
+
+    Checked without importing it: that would load torch into every worker.
+    """
+    return importlib.util.find_spec("sentence_transformers") is not None
+
+
+def _hashed_features(text):
+    feats = []
+    for tok in tokenize(text):
+        feats.append(tok)
+        padded = f"<{tok}>"
+        feats.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return feats
+
+
+class HashingEmbedder:
+    name = HASHING_MODEL
+
+    def encode(self, texts):
+        out = np.zeros((len(texts), HASHING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in _hashed_features(text):
+                digest = hashlib.blake2b(feat.encode(), digest_size=8).digest()
+                h = int.from_bytes(digest, "little")
+                out[row, h % HASHING_DIM] += 1.0 if (h >> 63) else -1.0
+        return _normalise(out)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self._model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts):
+        vectors = self._model.encode(list(texts), batch_size=64, convert_to_numpy=True,
+                                     normalize_embeddings=True, show_progress_bar=False)
+        return vectors.astype(np.float32, copy=False)
+
+
+def _normalise(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+_embedders = {}
+_embedder_lock = threading.Lock()
+
+
+def get_embedder(model_name=None):
+    model_name = model_name or (EMBEDDING_MODEL if model_available() else HASHING_MODEL)
+    with _embedder_lock:
+        if model_name not in _embedders:
+            if model_name == HASHING_MODEL:
+                _embedders[model_name] = HashingEmbedder()
+            else:
+                _embedders[model_name] = SentenceTransformerEmbedder(model_name)
+        return _embedders[model_name]
+
+
+def _fingerprint(texts):
+    h = hashlib.sha256()
+    for text in texts:
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def embeddings_path(source):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(CACHE_DIR, f"{stem}.embeddings.npy")
+
+
+def _file_identity(path):
+    """`[size, mtime_ns]` of `path`, or None if it doesn't exist; a rename keeps both."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def build_embeddings(catalogue, dest, model_name=None):
+    """Embed every catalogue row and write the matrix plus a JSON sidecar to `dest`.
+
+    Both files are replaced atomically, and the sidecar records which matrix file it
+    describes, so a reader between the two renames sees a mismatch rather than a
+    matrix from another build.
+    """
+    embedder = get_embedder(model_name)
+    texts = row_texts(catalogue)
+    matrix = embedder.encode(texts)
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, matrix)
+    meta = {"model": embedder.name, "rows": len(texts), "fingerprint": _fingerprint(texts),
+            "matrix": _file_identity(tmp)}
+    with open(f"{tmp}.json", "w") as f:
+        json.dump(meta, f)
+    os.replace(f"{tmp}.json", f"{dest}.json")
+    os.replace(tmp, dest)
+    return dest
+
+
+class SemanticIndex:
+    def __init__(self, catalogue, matrix, model_name):
+        self.refs = catalogue.table.column(REF_COL)
+        self.items = catalogue.table.column(ITEM_COL)
+        self.matrix = matrix
+        self.model_name = model_name
+
+    @property
+    def embedder(self):
+        # Loaded on the first query, so offering meaning search does not import torch
+        return get_embedder(self.model_name)
+
+    def search(self, query, k=10):
+        """Return up to `k` `(ref_no, support_item, cosine)` tuples, best first."""
+        if not query.strip():
+            return []
+        q = self.embedder.encode([query])[0]
+        scores = self.matrix @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.refs[i].as_py(), self.items[i].as_py(), float(scores[i]))
+                for i in top if scores[i] > 0]
+
+
+def load_semantic_index(catalogue, dest):
+    """Memory-map the embeddings at `dest`, or return None if missing or out of date."""
+    try:
+        with open(f"{dest}.json") as f:
+            meta = json.load(f)
+        identity = _file_identity(dest)
+        matrix = np.load(dest, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    # Replaced while loading, or not the matrix the sidecar was written for
+    if identity != meta.get("matrix") or _file_identity(dest) != identity:
+        return None
+    if matrix.shape[0] != len(catalogue) or meta.get("fingerprint") != _fingerprint(row_texts(catalogue)):
+        return None
+    if meta["model"] != HASHING_MODEL and not model_available():
+        return None
+    return SemanticIndex(catalogue, matrix, meta["model"])
+
+
+_lock = threading.Lock()
+_indexes = weakref.WeakKeyDictionary()
+
+
+def get_semantic_index(catalogue, source):
+    """Semantic index for a catalogue loaded from `source`, or None if there is no
+    up-to-date one built with an embedding model.
+
+    The result, a miss included, is kept until either file changes, so running
+    build-embeddings on a live deployment is picked up by the next query.
+    """
+    dest = embeddings_path(source)
+    files = (_file_identity(f"{dest}.json"), _file_identity(dest))
+    cached = _indexes.get(catalogue)
+    if cached is None or cached[0] != files:
+        with _lock:
+            cached = _indexes.get(catalogue)
+            if cached is None or cached[0] != files:
+                index = load_semantic_index(catalogue, dest)
+                if index is not None and index.model_name == HASHING_MODEL:
+                    index = None
+                cached = _indexes[catalogue] = (files, index)
+    return cached[1]
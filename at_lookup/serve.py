@@ -0,0 +1,171 @@
+"""Run several Streamlit workers behind a sticky-session load balancer.
+
+A single `streamlit run` process serves every session from one interpreter,
+so CPU work from all users contends for one GIL. `serve` starts N workers on
+local ports and a small asyncio proxy on the public port. A new browser is
+given a worker round-robin and pinned to it with a cookie, because a Streamlit
+session and its websocket live in one process.
+
+Workers share state through files rather than memory: the compiled catalogue
+and embeddings are memory-mapped (one copy in the page cache for all of them)
+and the response cache is SQLite in WAL mode. Coalescing and rate limiting
+stay per process, with each worker taking its share of the rate budget.
+"""
+import asyncio
+import itertools
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+COOKIE = "at_worker"
+
+_COOKIE = re.compile(rb"^cookie:.*?\b" + COOKIE.encode() + rb"=(\d+)", re.IGNORECASE | re.MULTILINE)
+
+
+class Worker:
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.proc = None
+        self.connections = 0
+
+    def start(self, env):
+        self.proc = subprocess.Popen([
+            sys.executable, "-m", "streamlit", "run", APP,
+            f"--server.port={self.port}", "--server.address=127.0.0.1",
+            "--server.headless=true",
+        ], env=env)
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def healthy(self):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health",
+                                        timeout=1) as resp:
+                return resp.status == 200
+        except OSError:
+            return False
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class Balancer:
+    def __init__(self, workers):
+        self.workers = workers
+        self._next = itertools.count()
+
+    def pick(self, head):
+        """Return `(worker, assigned)`: the pinned worker, or a new one if none is usable."""
+        m = _COOKIE.search(head)
+        if m and int(m.group(1)) < len(self.workers) and self.workers[int(m.group(1))].alive:
+            return self.workers[int(m.group(1))], False
+        live = [w for w in self.workers if w.alive] or self.workers
+        return live[next(self._next) % len(live)], True
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        worker, assigned = self.pick(head)
+        try:
+            up_reader, up_writer = await asyncio.open_connection("127.0.0.1", worker.port)
+        except OSError:
+            writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+        worker.connections += 1
+        try:
+            up_writer.write(head)
+            upstream = asyncio.ensure_future(_pipe(reader, up_writer))
+            if assigned:
+                # Pin the browser to this worker on the first response
+                try:
+                    resp = await up_reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    upstream.cancel()
+                    writer.close()
+                    return
+                cookie = f"Set-Cookie: {COOKIE}={worker.index}; Path=/; HttpOnly; SameSite=Lax\r\n"
+                writer.write(resp[:-2] + cookie.encode() + b"\r\n")
+            await asyncio.gather(upstream, _pipe(up_reader, writer))
+        finally:
+            worker.connections -= 1
+
+
+def worker_env(index, workers):
+    env = dict(os.environ, AT_WORKERS=str(workers), AT_WORKER_INDEX=str(index))
+    # Each worker exposes its own /metrics on consecutive ports
+    if os.getenv("AT_METRICS_PORT"):
+        env["AT_METRICS_PORT"] = str(int(os.environ["AT_METRICS_PORT"]) + index)
+    return env
+
+
+def prepare_shared_state():
+    """Compile the catalogue and create the response cache once, before workers race to."""
+    from at_lookup.catalogue import DEFAULT_PATH, get_catalogue
+    from at_lookup.response_cache import get_response_cache
+
+    if os.path.exists(DEFAULT_PATH):
+        get_catalogue(DEFAULT_PATH)
+    get_response_cache()
+
+
+async def _supervise(workers, log):
+    while True:
+        await asyncio.sleep(2)
+        for w in workers:
+            if not w.alive:
+                print(f"worker {w.index} exited ({w.proc.returncode}); restarting", file=log)
+                w.start(worker_env(w.index, len(workers)))
+
+
+async def _serve(workers, host, port, log):
+    balancer = Balancer(workers)
+    server = await asyncio.start_server(balancer.handle, host, port)
+    print(f"Serving {len(workers)} workers on http://{host}:{port}", file=log)
+    async with server:
+        await asyncio.gather(server.serve_forever(), _supervise(workers, log))
+
+
+def serve(workers=2, host="0.0.0.0", port=8501, worker_port=8601, log=sys.stderr):
+    if workers <= 1:
+        os.execv(sys.executable, [sys.executable, "-m", "streamlit", "run", APP,
+                                  f"--server.port={port}", f"--server.address={host}"])
+    prepare_shared_state()
+    pool = [Worker(i, worker_port + i) for i in range(workers)]
+    for w in pool:
+        w.start(worker_env(w.index, workers))
+    try:
+        deadline = time.monotonic() + 120
+        while not all(w.healthy() for w in pool) and time.monotonic() < deadline:
+            time.sleep(0.5)
+        asyncio.run(_serve(pool, host, port, log))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for w in pool:
+            if w.alive:
+                w.proc.terminate()
+        for w in pool:
+            if w.proc is not None:
+                w.proc.wait()
@@ -0,0 +1,142 @@
+"""Page styling injected once per run by streamlit_app.py."""
+
+# Global CSS for readability
+CSS = """
+    <style>
+    html, body, [class*="css"], .block-container {
+        font-size: 24px !important;
+        line-height: 1.6 !important;
+    }
+    .stTextInput label, .stSelectbox label, .stTextArea label {
+        font-size: 22px !important;
+    }
+    
+    /* Tab styling - consolidated and corrected */
+    /* Tab styling - Modern Office Look */
+.stTabs [data-baseweb="tab-list"] {
+    gap: 8px;
+}
+
+.stTabs [data-baseweb="tab"] {
+    height: 50px;
+    padding: 0.75rem 1.5rem !important;
+    font-size: 30px !important;
+    font-weight: 600 !important;
+    background-color: #e8f4f8 !important;
+    border: 2px solid #4a90a4 !important;
+    border-bottom: none !important;
+    border-radius: 6px 6px 0 0 !important;
+    box-shadow: 0 -3px 6px rgba(0,0,0,0.15) !important;
+    background-image: linear-gradient(145deg, #ffffff 0%, #e8f4f8 100%) !important;
+}
+
+.stTabs [data-baseweb="tab"][aria-selected="true"] {
+    font-size: 30px !important;
+    font-weight: 700 !important;
+    color: #1f77b4 !important;
+    background-color: #ffffff !important;
+    border-color: #2c5f73 !important;
+    border-width: 3px !important;
+    box-shadow: 0 -8px 16px rgba(44,95,115,0.25) !important;
+}
+
+.stTabs [data-baseweb="tab"] p {
+    font-size: 30px !important;
+    font-weight: inherit !important;
+    margin: 0 !important;
+}
+
+/* Alternative selectors for different Streamlit versions */
+.stTabs [role="tab"] {
+    font-size: 30px !important;
+    padding: 0.75rem 1.5rem !important;
+    font-weight: 600 !important;
+    background-color: #e8f4f8 !important;
+    border: 2px solid #4a90a4 !important;
+    border-bottom: none !important;
+    border-radius: 6px 6px 0 0 !important;
+    box-shadow: 0 -3px 6px rgba(0,0,0,0.15) !important;
+    background-image: linear-gradient(145deg, #ffffff 0%, #e8f4f8 100%) !important;
+}
+
+.stTabs [role="tab"][aria-selected="true"] {
+    font-size: 30px !important;
+    font-weight: 700 !important;
+    background-color: #ffffff !important;
+    border-color: #2c5f73 !important;
+    border-width: 3px !important;
+    box-shadow: 0 -8px 16px rgba(44,95,115,0.25) !important;
+}
+
+/* any tab NOT aria-selected */
+.stTabs [data-baseweb="tab"]:not([aria-selected="true"]),
+.stTabs [role="tab"]:not([aria-selected="true"]) {
+    color: #444444 !important;
+}
+    
+    .block-container {
+        padding: 3rem 5rem !important;
+    }
+    .landing-section {
+        background-color: #f8f9fa;
+        padding: 2rem;
+        border-radius: 0.5rem;
+        margin-bottom: 2rem;
+        color: #212529 !important;
+    }
+    .landing-section h2, .landing-section h3, .landing-section p {
+        color: #212529 !important;
+    }
+    .feature-box {
+        background-color: #e3f2fd;
+        padding: 1.5rem;
+        border-radius: 0.5rem;
+        margin-bottom: 1rem;
+        border-left: 4px solid #2196f3;
+        color: #1565c0 !important;
+    }
+    .feature-box h3 {
+        color: #1565c0 !important;
+        margin-bottom: 1rem;
+    }
+    .feature-box p, .feature-box li {
+        color: #1565c0 !important;
+    }
+    .feature-box ul, .feature-box ol {
+        color: #1565c0 !important;
+    }
+    .feature-box strong {
+        color: #0d47a1 !important;
+    }
+    /* Ensure all text elements in these containers are visible */
+    .landing-section *, .feature-box * {
+        color: inherit !important;
+    }
+    .title-container {
+        display: flex;
+        align-items: center;
+        gap: 20px;
+        margin-bottom: 2rem;
+    }
+    .title-text {
+        flex: 1;
+    }
+    .title-image {
+        flex-shrink: 0;
+    }
+    .feedback-section {
+        background-color: #1565c0;
+        padding: 2rem;
+        border-radius: 0.5rem;
+        margin-bottom: 2rem;
+        border-left: 4px solid #003366;
+        color: #ffffff !important;
+    }
+    .feedback-section h2, .feedback-section h3, .feedback-section p {
+        color: #ffffff !important;
+    }
+    .feedback-section strong {
+        color: #ffffff !important;
+    }
+    </style>
+    """
@@ -0,0 +1,55 @@
+"""Token counting for prompts before they are sent.
+
+tiktoken is optional. Without it, counts are estimated at four characters per
+token, which is close enough for English prompts when budgeting and rate
+limiting.
+"""
+import functools
+import importlib.util
+
+from at_lookup import config
+
+# Imported on the first count rather than at start-up; it is slow to import
+_HAVE_TIKTOKEN = importlib.util.find_spec("tiktoken") is not None
+
+CHARS_PER_TOKEN = 4
+
+# Formatting tokens the chat format adds per message, plus the reply primer
+_PER_MESSAGE = 4
+_PER_REQUEST = 3
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+# The system prompts repeat on every request; only their count is worth keeping
+@functools.lru_cache(maxsize=64)
+def _count_cached(text, model):
+    return count_tokens(text, model)
+
+
+def count_tokens(text, model=None):
+    if not _HAVE_TIKTOKEN:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(_encoding(model or config.MODEL).encode(text))
+
+
+def count_prompt_tokens(system_prompt, user_prompt, model=None):
+    """Input tokens for a system + user chat request."""
+    return (_count_cached(system_prompt, model) + count_tokens(user_prompt, model)
+            + 2 * _PER_MESSAGE + _PER_REQUEST)
+
+
+def truncate_tokens(text, limit, model=None):
+    """Cut `text` to at most `limit` tokens."""
+    if not _HAVE_TIKTOKEN:
+        return text[:limit * CHARS_PER_TOKEN]
+    encoding = _encoding(model or config.MODEL)
+    return encoding.decode(encoding.encode(text)[:limit])
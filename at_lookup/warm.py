@@ -0,0 +1,67 @@
+"""Precompute the default (no additional context) report for every catalogue row."""
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from at_lookup import config
+from at_lookup.catalogue import DESC_COL, ITEM_COL
+from at_lookup.llm import complete, is_cacheable, with_retries
+from at_lookup.prompt import PROMPT_VERSION, build_system_prompt, build_user_prompt
+from at_lookup.response_cache import make_key
+
+
+def plan(catalogue, cache, model=None):
+    """Return `(todo, stale)`: rows needing a report and ref keys no longer in the catalogue.
+
+    A row is skipped when its stored report was generated from the same prompt
+    key, i.e. the same row text, prompt version and model.
+    """
+    model = model or config.MODEL
+    have = cache.precomputed_keys()
+    system_prompt = build_system_prompt()
+    todo = []
+    for pos in range(len(catalogue)):
+        item = catalogue.row(pos)
+        ref_key = catalogue.key(pos)
+        user_prompt = build_user_prompt(item[ITEM_COL].strip(), item[DESC_COL].strip())
+        key = make_key(system_prompt, user_prompt, model, PROMPT_VERSION)
+        if have.get(ref_key) != key:
+            todo.append((ref_key, key, user_prompt))
+    stale = set(have) - set(catalogue.keys.to_pylist())
+    return todo, stale
+
+
+def _generate(client, cache, model, ref_key, key, user_prompt):
+    # An on-demand lookup may already have produced this exact report
+    report = cache.get(key)
+    if report is None:
+        finish = []
+        report = with_retries(complete, client, model, build_system_prompt(), user_prompt,
+                              on_finish=finish.append)
+        if not is_cacheable(report, finish[-1] if finish else None):
+            # Counted as a failure, so the next run tries this row again
+            raise RuntimeError("empty or truncated report; raise AT_MAX_TOKENS")
+    cache.put_precomputed(ref_key, key, report)
+    return ref_key
+
+
+def warm(client, catalogue, cache, concurrency=4, limit=None, model=None, log=sys.stderr):
+    model = model or config.MODEL
+    todo, stale = plan(catalogue, cache, model)
+    if stale:
+        cache.delete_precomputed(stale)
+    if limit is not None:
+        todo = todo[:limit]
+    print(f"{len(catalogue)} rows, {len(todo)} to generate, {len(stale)} removed", file=log)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(_generate, client, cache, model, *job): job[0] for job in todo}
+        for n, future in enumerate(as_completed(futures), start=1):
+            try:
+                future.result()
+                status = "ok"
+            except Exception as e:
+                failures += 1
+                status = f"API error: {e}"
+            print(f"[{n}/{len(todo)}] {futures[future]}: {status}", file=log)
+    return failures
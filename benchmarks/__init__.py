@@ -0,0 +1 @@
+"""Benchmarks for the catalogue, prompt and parser paths, and an end-to-end load test."""
@@ -0,0 +1,105 @@
+"""Micro-benchmarks for catalogue loading, Ref No. lookup, prompt building and parsing.
+
+    python -m benchmarks.bench_catalogue --sizes 1000 10000 100000 1000000
+
+Synthetic guides are written to --workdir once and reused. Parsing docx is
+still several times slower than csv, so docx is only benchmarked up to
+--max-docx-rows; csv covers the rest.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+from at_lookup import catalogue
+from at_lookup.prompt import build_user_prompt
+from at_lookup.search import SearchIndex
+from at_lookup.sections import SectionStream, parse_sections
+from benchmarks.common import print_table, summarise, time_each, time_once
+from benchmarks.synthetic import ensure_catalogue, make_report, ref_for
+
+
+def bench_size(fmt, n, workdir, ops, rng):
+    rows = []
+    label = f"{fmt} {n:>8,} rows"
+    path = ensure_catalogue(workdir, fmt, n)
+
+    table, samples = time_once(catalogue.parse_source, path)
+    rows.append(summarise(f"{label}: parse + compile", samples))
+
+    dest = os.path.join(workdir, f"synthetic_{n}.{fmt}.arrow")
+    _, samples = time_once(catalogue.build_artifact, path, dest)
+    rows.append(summarise(f"{label}: build artifact", samples))
+
+    cat, samples = time_once(lambda: catalogue.Catalogue(catalogue.load_artifact(dest)), repeat=5)
+    rows.append(summarise(f"{label}: open artifact (mmap)", samples))
+
+    # Half hits, half misses, with the whitespace a user might paste
+    refs = [(f" {ref_for(rng.randrange(n))} ",) if i % 2 else (f"05_{rng.randrange(10**9):09d}_X",)
+            for i in range(ops)]
+    samples, wall = time_each(cat.lookup, refs)
+    rows.append(summarise(f"{label}: lookup", samples, wall))
+
+    if n <= 100_000:
+        index, samples = time_once(SearchIndex, cat)
+        rows.append(summarise(f"{label}: build search index", samples))
+        queries = [(q,) for q in ["shower commode", "wheelchair tilt", "paediatric seating",
+                                  "hoist portable", "comode", "05_0000012"] * (ops // 60 or 1)]
+        samples, wall = time_each(index.search, queries)
+        rows.append(summarise(f"{label}: search", samples, wall))
+    return rows
+
+
+def bench_prompt_and_parser(ops):
+    rows = []
+    args = [("Shower Commode - Wheeled", "A wheeled shower commode " * 10, ctx)
+            for ctx in ("", "paediatric, wheelchair transfers") * (ops // 2)]
+    samples, wall = time_each(build_user_prompt, args)
+    rows.append(summarise("build_user_prompt", samples, wall))
+
+    report = make_report()
+    samples, wall = time_each(parse_sections, [(report,)] * (ops // 10 or 1))
+    rows.append(summarise(f"parse_sections ({len(report):,} chars)", samples, wall))
+
+    chunks = [report[i:i + 20] for i in range(0, len(report), 20)]
+
+    def stream_parse():
+        parser = SectionStream()
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.finish()
+
+    samples, wall = time_each(stream_parse, [()] * (ops // 100 or 1))
+    rows.append(summarise(f"SectionStream ({len(chunks)} chunks)", samples, wall))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--formats", nargs="+", default=["docx", "csv"], choices=["docx", "csv"])
+    parser.add_argument("--max-docx-rows", type=int, default=100_000)
+    parser.add_argument("--ops", type=int, default=10_000, help="Operations per latency benchmark")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "at_lookup_bench"))
+    parser.add_argument("--json", help="Also write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    results = bench_prompt_and_parser(args.ops)
+    for n in args.sizes:
+        for fmt in args.formats:
+            if fmt == "docx" and n > args.max_docx_rows:
+                continue
+            results += bench_size(fmt, n, args.workdir, args.ops, rng)
+            print(f"done: {fmt} {n:,}", file=sys.stderr)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
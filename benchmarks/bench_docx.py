@@ -0,0 +1,130 @@
+"""Code Guide .docx compilation: the streaming reader against python-docx.
+
+    python -m benchmarks.bench_docx --sizes 1000 10000 50000
+
+Both readers run on synthetic guides, on data/support_items.docx when present,
+and on a small document that exercises merged cells, tabs, line breaks,
+hyperlinks and nested tables. The compiled tables are checked to be identical,
+and the script exits non-zero on a mismatch.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from io import BytesIO
+
+import pandas as pd
+from docx import Document
+from docx.oxml import OxmlElement
+
+from at_lookup.catalogue import DEFAULT_PATH, KEY_COL, REF_COL, REQUIRED_COLUMNS, normalise_ref, parse_source
+from benchmarks.common import print_table, summarise, time_once
+from benchmarks.synthetic import HEADERS, ensure_catalogue
+
+
+def legacy_parse_docx(path):
+    """How a .docx was compiled before the streaming reader: python-docx, then pandas."""
+    with open(path, "rb") as f:
+        doc = Document(BytesIO(f.read()))
+    tables = []
+    for tbl in doc.tables:
+        headers = [c.text.strip() for c in tbl.rows[0].cells]
+        if REQUIRED_COLUMNS.issubset(headers):
+            rows = []
+            for row in tbl.rows[1:]:
+                rows.append({hdr: row.cells[idx].text.strip()
+                             for idx, hdr in enumerate(headers)})
+            tables.append(pd.DataFrame(rows))
+    if not tables:
+        return None
+    df = pd.concat(tables, ignore_index=True).fillna("").astype(str)
+    df[KEY_COL] = df[REF_COL].map(normalise_ref)
+    # Rows without a Ref No. are dropped as the compiled catalogue does, so only the readers differ
+    df = df[df[KEY_COL] != ""]
+    return df.drop_duplicates(KEY_COL, keep="first").reset_index(drop=True)
+
+
+def _hyperlink(paragraph, text):
+    link = OxmlElement("w:hyperlink")
+    run = OxmlElement("w:r")
+    t = OxmlElement("w:t")
+    t.text = text
+    run.append(t)
+    link.append(run)
+    paragraph._p.append(link)
+
+
+def write_edge_cases(path):
+    doc = Document()
+    doc.add_paragraph("A table without the catalogue columns is skipped")
+    doc.add_table(rows=2, cols=2).cell(0, 0).text = "Something else"
+
+    table = doc.add_table(rows=6, cols=len(HEADERS) + 1)
+    for i, header in enumerate(HEADERS + ["Notes"]):
+        table.cell(0, i).text = f" {header} "
+    for r in range(1, 6):
+        for c in range(len(HEADERS)):
+            table.cell(r, c).text = f"r{r}c{c}"
+    table.cell(1, 0).text = "Tabbed\titem with\na line break"
+    table.cell(1, 2).add_paragraph("Second paragraph")
+    _hyperlink(table.cell(1, 2).paragraphs[0], " see link")
+    table.cell(2, 3).merge(table.cell(2, 4))          # horizontal span
+    table.cell(2, 5).merge(table.cell(4, 5))          # vertical span
+    table.cell(3, 2).add_table(rows=1, cols=1).cell(0, 0).text = "nested, not in cell text"
+    run = table.cell(4, 0).paragraphs[0].add_run()
+    run.add_break()
+    run.add_text("after break")
+    doc.add_page_break()
+
+    second = doc.add_table(rows=2, cols=3)
+    for i, header in enumerate(["Description", "Support Item Ref No.", "Support Item"]):
+        second.cell(0, i).text = header
+    for i, value in enumerate(["Reordered columns", "06_1", "Second table"]):
+        second.cell(1, i).text = value
+    doc.save(path)
+    return path
+
+
+def compare(label, path, repeat):
+    legacy, legacy_samples = time_once(legacy_parse_docx, path, repeat=repeat)
+    fast, fast_samples = time_once(lambda: parse_source(path).to_pandas(), repeat=repeat)
+    same = list(legacy.columns) == list(fast.columns) and legacy.equals(fast)
+    rows = len(fast)
+    return same, [summarise(f"{label} ({rows:,} rows): python-docx", legacy_samples),
+                  summarise(f"{label} ({rows:,} rows): streaming", fast_samples)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "at_lookup_bench"))
+    parser.add_argument("--json", help="Also write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    cases = [("edge cases", write_edge_cases(os.path.join(args.workdir, "edge_cases.docx")))]
+    if os.path.exists(DEFAULT_PATH):
+        cases.append(("support_items.docx", DEFAULT_PATH))
+    cases += [(f"synthetic {n:,}", ensure_catalogue(args.workdir, "docx", n)) for n in args.sizes]
+
+    results, mismatched = [], []
+    for label, path in cases:
+        same, rows = compare(label, path, args.repeat)
+        results += rows
+        if not same:
+            mismatched.append(label)
+        print(f"done: {label} ({'identical' if same else 'MISMATCH'})", file=sys.stderr)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if mismatched:
+        print(f"Output differs from python-docx for: {', '.join(mismatched)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Cold-start cost: import time and which heavy packages the app pulls in.
+
+Every sample runs in a fresh interpreter, as a new container would:
+
+- `import <module>` for the app's own modules;
+- the first run of streamlit_app.py (the landing page, no search) through
+  AppTest, with compiled artifacts already in place as they are in the image.
+
+Each row lists the heavy dependencies that ended up loaded. With --baseline
+the same probes run against a git revision, extracted to a temporary
+directory, for a before/after comparison; give the last commit that still
+imported them at module top.
+
+    python -m benchmarks.bench_import --baseline <rev> --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import percentile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "docx", "openai", "trubrics", "streamlit_feedback", "PIL", "pyarrow", "numpy",
+         "sentence_transformers", "torch", "tiktoken")
+
+PROBES = [
+    ("import streamlit", "", "import streamlit"),
+    ("import at_lookup.catalogue", "", "import at_lookup.catalogue"),
+    ("import at_lookup.llm", "", "import at_lookup.llm"),
+    ("first page (AppTest)",
+     "from streamlit.testing.v1 import AppTest",
+     "AppTest.from_file('streamlit_app.py', default_timeout=300).run()"),
+]
+
+_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, '.')
+{setup}
+before = set(sys.modules)
+t = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t
+heavy = {heavy!r}
+print(json.dumps({{"seconds": elapsed,
+                   "loaded": [m for m in heavy if m in sys.modules and m not in before]}}))
+"""
+
+
+def probe(tree, setup, body, env):
+    script = _SCRIPT.format(setup=setup, body=body, heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", script], cwd=tree, env=env,
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(tree, label, repeat):
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "sk-bench"),
+               AT_CACHE_DIR=os.path.join(tree, "cache"), PYTHONDONTWRITEBYTECODE="")
+    # One unmeasured run builds the catalogue artifact and image variants, as the image does
+    probe(tree, PROBES[-1][1], PROBES[-1][2], env)
+    rows = []
+    for name, setup, body in PROBES:
+        results = [probe(tree, setup, body, env) for _ in range(repeat)]
+        results = [r for r in results if r is not None]
+        if not results:
+            rows.append({"tree": label, "probe": name, "p50_ms": None, "loaded": []})
+            continue
+        samples = [r["seconds"] for r in results]
+        rows.append({"tree": label, "probe": name,
+                     "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                     "max_ms": round(max(samples) * 1000, 1),
+                     "loaded": results[0]["loaded"]})
+    return rows
+
+
+def extract(rev, dest):
+    archive = subprocess.run(["git", "-C", REPO, "archive", rev], capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", dest], input=archive.stdout, check=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", help="Git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per probe")
+    parser.add_argument("--json", help="Also write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="at_lookup_import_") as tmp:
+        if args.baseline:
+            base = os.path.join(tmp, "baseline")
+            os.makedirs(base)
+            extract(args.baseline, base)
+            rows += measure(base, args.baseline, args.repeat)
+        work = os.path.join(tmp, "current")
+        # The working tree, minus caches, so both sides start from the same state
+        subprocess.run(["cp", "-r", REPO, work], check=True)
+        subprocess.run(["rm", "-rf", os.path.join(work, "cache")], check=True)
+        rows += measure(work, "working tree", args.repeat)
+
+    print(f"{'tree':<14} {'probe':<28} {'p50 ms':>9} {'max ms':>9}  heavy modules loaded")
+    print("-" * 96)
+    for r in rows:
+        p50 = "failed" if r["p50_ms"] is None else f"{r['p50_ms']:.1f}"
+        print(f"{r['tree']:<14} {r['probe']:<28} {p50:>9} {r.get('max_ms', ''):>9}  "
+              f"{', '.join(r['loaded']) or '-'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Peak memory and time to compile a Code Guide into the catalogue artifact.
+
+Each build runs `build_artifact` in a fresh interpreter and reports how far its
+peak RSS rose above the process's size before parsing began (parsing libraries
+are imported first, so only data counts). With --baseline the same builds run
+against a git revision for a before/after comparison; give the last commit that
+still parsed the whole guide in one go.
+
+    python -m benchmarks.bench_ingest --baseline <rev>
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_import import REPO, extract
+from benchmarks.synthetic import ensure_catalogue
+
+_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, '.')
+for name in ("pandas", "docx", "lxml.etree"):
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+from at_lookup import catalogue
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t = time.perf_counter()
+catalogue.build_artifact({source!r}, {dest!r})
+elapsed = time.perf_counter() - t
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "peak_mb": (peak - before) / 1024}}))
+"""
+
+
+def build(tree, source, dest):
+    script = _SCRIPT.format(source=source, dest=dest)
+    out = subprocess.run([sys.executable, "-c", script], cwd=tree, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", help="Git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--docx-sizes", type=int, nargs="*", default=[10_000, 50_000])
+    parser.add_argument("--csv-sizes", type=int, nargs="*", default=[100_000, 1_000_000])
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "at_lookup_bench"))
+    parser.add_argument("--json", help="Also write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    sources = [ensure_catalogue(args.workdir, "docx", n) for n in args.docx_sizes]
+    sources += [ensure_catalogue(args.workdir, "csv", n) for n in args.csv_sizes]
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="at_lookup_ingest_") as tmp:
+        trees = [("working tree", REPO)]
+        if args.baseline:
+            base = os.path.join(tmp, "baseline")
+            os.makedirs(base)
+            extract(args.baseline, base)
+            trees.insert(0, (args.baseline, base))
+        for label, tree in trees:
+            for source in sources:
+                result = build(tree, source, os.path.join(tmp, "out.arrow")) or {}
+                rows.append({"tree": label, "source": os.path.basename(source), **result})
+                print(f"done: {label} {os.path.basename(source)}", file=sys.stderr)
+
+    print(f"{'tree':<14} {'source':<28} {'seconds':>9} {'peak MB':>9}")
+    print("-" * 63)
+    for r in rows:
+        if "seconds" not in r:
+            print(f"{r['tree']:<14} {r['source']:<28} {'failed':>9}")
+            continue
+        print(f"{r['tree']:<14} {r['source']:<28} {r['seconds']:>9.2f} {r['peak_mb']:>9.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Per-process memory held by a loaded catalogue, its search index and looked-up rows.
+
+Each stage runs in a fresh interpreter against a compiled artifact, and reports
+how much the process grew in RSS and in anonymous (heap) memory. The difference
+is the memory-mapped artifact, whose pages the page cache shares between every
+process reading it. Heap is what each `serve` worker pays again, so it is the
+number that multiplies with --workers. With --baseline the same stages run
+against a git revision for a before/after comparison; give the last commit that
+still kept a Python dict of every Ref No.
+
+    python -m benchmarks.bench_memory --baseline <rev> --sizes 100000 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_import import REPO, extract
+from benchmarks.synthetic import ensure_catalogue
+
+STAGES = ("catalogue", "lookups", "search index")
+
+_SCRIPT = """
+import gc, json, random, sys
+sys.path.insert(0, '.')
+import pyarrow, pyarrow.compute, numpy
+from at_lookup import catalogue
+from at_lookup.catalogue import DESC_COL, ITEM_COL, REF_COL
+
+
+def memory():
+    gc.collect()
+    fields = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {{"rss": fields["Rss"], "heap": fields["Anonymous"]}}
+
+
+# Arrow's compute kernels and thread pool are set up on first use; don't count them
+pyarrow.compute.sort_indices(pyarrow.array(["b", "a"]))
+start = memory()
+result = {{}}
+cat = catalogue.Catalogue(catalogue.load_artifact({dest!r}))
+result["catalogue"] = memory()
+refs = cat.table.column(REF_COL)
+rng = random.Random(0)
+# What a session keeps from a lookup: the row's name, description and Ref No.
+kept = []
+for _ in range(1000):
+    row = cat.lookup(refs[rng.randrange(len(cat))].as_py())
+    kept.append((row[REF_COL], row[ITEM_COL], row[DESC_COL]))
+result["lookups"] = memory()
+if {search}:
+    from at_lookup.search import SearchIndex
+    index = SearchIndex(cat)
+    result["search index"] = memory()
+print(json.dumps({{k: {{m: v[m] - start[m] for m in v}} for k, v in result.items()}}))
+"""
+
+
+def measure(tree, dest, search):
+    script = _SCRIPT.format(dest=dest, search=search)
+    out = subprocess.run([sys.executable, "-c", script], cwd=tree, capture_output=True, text=True)
+    if out.returncode != 0:
+        print(out.stderr, file=sys.stderr)
+        return {}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compile_in(tree, source, dest):
+    subprocess.run([sys.executable, "-c",
+                    f"import sys; sys.path.insert(0, '.'); from at_lookup import catalogue; "
+                    f"catalogue.build_artifact({source!r}, {dest!r})"],
+                   cwd=tree, check=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", help="Git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--max-search-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4, help="Processes to total heap memory for")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "at_lookup_bench"))
+    parser.add_argument("--json", help="Also write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="at_lookup_memory_") as tmp:
+        trees = [("working tree", REPO)]
+        if args.baseline:
+            base = os.path.join(tmp, "baseline")
+            os.makedirs(base)
+            extract(args.baseline, base)
+            trees.insert(0, (args.baseline, base))
+        for n in args.sizes:
+            source = ensure_catalogue(args.workdir, "csv", n)
+            for label, tree in trees:
+                # Each tree compiles its own artifact, in case the format differs
+                dest = os.path.join(tmp, f"{len(rows)}.arrow")
+                compile_in(tree, source, dest)
+                stages = measure(tree, dest, n <= args.max_search_rows)
+                for stage in STAGES:
+                    if stage in stages:
+                        rows.append({"tree": label, "rows": n, "stage": stage, **stages[stage]})
+                print(f"done: {label} {n:,}", file=sys.stderr)
+
+    print(f"{'tree':<14} {'rows':>10} {'after':<14} {'RSS MB':>9} {'heap MB':>11} "
+          f"{f'x{args.workers} workers':>12}")
+    print("-" * 75)
+    for r in rows:
+        print(f"{r['tree']:<14} {r['rows']:>10,} {r['stage']:<14} {r['rss']:>9.1f} "
+              f"{r['heap']:>11.1f} {r['heap'] * args.workers:>12.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Timing helpers shared by the benchmark scripts."""
+import statistics
+import time
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarise(name, samples, wall=None):
+    """One result row: per-op latency percentiles (ms) and throughput."""
+    wall = wall if wall is not None else sum(samples)
+    return {
+        "name": name,
+        "n": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": (statistics.fmean(samples) * 1000) if samples else float("nan"),
+        "ops_s": len(samples) / wall if wall else float("nan"),
+    }
+
+
+def time_each(fn, args_iter):
+    samples = []
+    start = time.perf_counter()
+    for args in args_iter:
+        t = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t)
+    return samples, time.perf_counter() - start
+
+
+def time_once(fn, *args, repeat=1):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - t)
+    return result, samples
+
+
+def print_table(rows, file=None):
+    header = f"{'benchmark':<44} {'n':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>12}"
+    print(header, file=file)
+    print("-" * len(header), file=file)
+    for r in rows:
+        print(f"{r['name']:<44} {r['n']:>7} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+              f"{r['p99_ms']:>10.3f} {r['ops_s']:>12.1f}", file=file)
@@ -0,0 +1,191 @@
+"""End-to-end load test: concurrent virtual users driving streamlit_app.py.
+
+Each virtual user is a Streamlit AppTest session running the real app script
+in its own process, like browsers spread over `serve --workers` (AppTest
+cannot run sessions concurrently on threads). Users share the compiled
+catalogue, the SQLite response cache and the API, and each takes its
+AT_WORKERS share of the rate limits. Completions come from the local mock
+server unless --base-url points elsewhere.
+
+    python -m benchmarks.load_test --users 16 --searches 5 --ttft 0.5 --tokens-per-second 80
+
+Reports p50/p95/p99 for page load and search (wall-clock per script run),
+plus the app's own phase timings from its metrics log (time to first token,
+generation, ...), and overall search throughput.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+class _TraceCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self._records_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            data = json.loads(record.getMessage())
+        except ValueError:
+            return
+        with self._records_lock:
+            self.records.append(data)
+
+
+def _checkbox(at, label):
+    return next(cb for cb in at.sidebar.checkbox if cb.label == label)
+
+
+def warm_up(args):
+    """Run the app once, so imports and the process-wide catalogue and indexes
+    load before anything is measured, as in a worker that is already serving."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"App failed to start: {at.exception[0].value}")
+    # A worker that has served a search also has the OpenAI library loaded
+    import openai  # noqa: F401
+
+
+def virtual_user(uid, refs, args, barrier):
+    """One user in its own process.
+
+    Returns `(page_loads, searches, failures, traces, span)`, where `span` is
+    the user's (start, end) wall-clock time after every user finished warming up.
+    """
+    from at_lookup.metrics import logger as metrics_logger
+
+    os.chdir(os.path.dirname(APP))
+    collector = _TraceCollector()
+    metrics_logger.addHandler(collector)
+    metrics_logger.setLevel(logging.INFO)
+    metrics_logger.propagate = False
+
+    page_loads, searches, failures = [], [], []
+    try:
+        warm_up(args)
+    except Exception as e:
+        failures.append([f"user {uid}: {e!r}"])
+    barrier.wait()
+    start = time.time()
+    if not failures:
+        try:
+            _virtual_user(uid, refs, args, page_loads, searches, failures)
+        except Exception as e:
+            # One broken session is a failed user, not a failed benchmark
+            failures.append([f"user {uid}: {e!r}"])
+    return page_loads, searches, failures, collector.records, (start, time.time())
+
+
+def _virtual_user(uid, refs, args, page_loads, searches, failures):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(uid)
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    t = time.perf_counter()
+    at.run()
+    page_loads.append(time.perf_counter() - t)
+    for _ in range(args.searches):
+        at.text_input(key="ref_no").input(rng.choice(refs))
+        _checkbox(at, "Force refresh").set_value(not args.cache)
+        _checkbox(at, "Parallel section generation").set_value(args.mode == "parallel")
+        at.sidebar.button[0].click()
+        t = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - t
+        if at.exception or at.error:
+            failures.append([e.value for e in at.error] or [str(e.value) for e in at.exception])
+        else:
+            searches.append(elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--searches", type=int, default=3, help="Searches per user")
+    parser.add_argument("--mode", choices=["stream", "parallel"], default="stream")
+    parser.add_argument("--cache", action="store_true",
+                        help="Allow response-cache hits (default forces fresh generations)")
+    parser.add_argument("--refs", type=int, default=50, help="Distinct Ref Nos. to draw from")
+    parser.add_argument("--base-url", help="Use this OpenAI-compatible API instead of the mock")
+    parser.add_argument("--ttft", type=float, default=0.5, help="Mock time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--words-per-section", type=int, default=250)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock 429 rate")
+    parser.add_argument("--rpm", type=int, help="Mock requests-per-minute limit")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per script run (s)")
+    args = parser.parse_args(argv)
+
+    # Configure the environment before anything imports at_lookup.config
+    os.environ.setdefault("AT_CACHE_DIR", tempfile.mkdtemp(prefix="at_lookup_load_"))
+    os.environ.setdefault("OPENAI_API_KEY", "sk-load-test")
+    # Each user's process is one worker of a deployment with --users workers
+    os.environ.setdefault("AT_WORKERS", str(args.users))
+    mock = None
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    else:
+        from benchmarks.mock_openai import MockConfig, start_mock_server
+
+        mock_cfg = MockConfig(ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+                              words_per_section=args.words_per_section,
+                              error_rate=args.error_rate, rpm=args.rpm)
+        mock, os.environ["OPENAI_BASE_URL"] = start_mock_server(mock_cfg)
+
+    from at_lookup.catalogue import REF_COL, get_catalogue
+    from benchmarks.common import print_table, summarise
+
+    os.chdir(os.path.dirname(APP))
+    # Compiled here once, so the users all open the same artifact
+    cat = get_catalogue()
+    all_refs = cat.table.column(REF_COL).to_pylist()
+    refs = random.Random(0).sample(all_refs, min(args.refs, len(all_refs)))
+
+    page_loads, searches, failures, traces, spans = [], [], [], [], []
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=args.users, mp_context=ctx) as pool:
+        barrier = manager.Barrier(args.users)
+        futures = [pool.submit(virtual_user, uid, refs, args, barrier)
+                   for uid in range(args.users)]
+        for f in futures:
+            user_page_loads, user_searches, user_failures, user_traces, span = f.result()
+            page_loads += user_page_loads
+            searches += user_searches
+            failures += user_failures
+            traces += user_traces
+            spans.append(span)
+    wall = max(end for _, end in spans) - min(start for start, _ in spans)
+
+    rows = [summarise("page load", page_loads),
+            summarise(f"search ({args.mode}, end to end)", searches, wall)]
+    traces = [r for r in traces if r.get("status") == "ok"]
+    phases = sorted({p for r in traces for p in r.get("phases_s", {})})
+    for phase in phases:
+        rows.append(summarise(f"  app phase: {phase}",
+                              [r["phases_s"][phase] for r in traces if phase in r["phases_s"]]))
+    print_table(rows)
+    print(f"\n{len(searches)} searches ok, {len(failures)} failed, {wall:.1f}s wall, "
+          f"{len(searches) / wall:.2f} searches/s with {args.users} users")
+    if mock is not None:
+        cfg = mock.RequestHandlerClass.config
+        print(f"mock API: {cfg.requests} requests, {cfg.errors} rate-limited")
+    for failure in failures[:5]:
+        print("failure:", failure, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""A local stand-in for the OpenAI chat completions API.
+
+Serves `POST /v1/chat/completions` (streaming and non-streaming) with a
+synthetic six-section report, after a configurable time to first token and at
+a configurable token rate. Prompts that ask for a subset of sections
+("Sections to write: ...") get only those. Output past `max_completion_tokens`
+is cut off with finish_reason "length". An optional fraction of requests fail
+with 429 and a Retry-After header, and an optional requests-per-minute limit is
+enforced and advertised in `x-ratelimit-*` headers like the real API. Point the
+app at it with `OPENAI_BASE_URL=http://127.0.0.1:<port>/v1`.
+
+    python -m benchmarks.mock_openai --port 8765 --ttft 0.5 --tokens-per-second 80
+"""
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import make_report
+
+_SECTIONS = re.compile(r"Sections to write: ([0-9, ]+)")
+_MARKER = re.compile(r"^===SECTION (\d+)===", re.MULTILINE)
+
+
+class MockConfig:
+    def __init__(self, ttft=0.5, tokens_per_second=80.0, words_per_section=250,
+                 chunk_tokens=4, error_rate=0.0, retry_after=1, rpm=None):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.words_per_section = words_per_section
+        self.chunk_tokens = chunk_tokens
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.recent = collections.deque()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+
+def _report_for(messages, words_per_section):
+    report = make_report(words_per_section)
+    m = _SECTIONS.search(messages[0]["content"]) if messages else None
+    if not m:
+        return report
+    wanted = {n.strip() for n in m.group(1).split(",")}
+    parts = _MARKER.split(report)
+    return "".join(f"===SECTION {parts[i]}==={parts[i + 1]}"
+                   for i in range(1, len(parts), 2) if parts[i] in wanted)
+
+
+def _admit(cfg):
+    """Count one request; returns `(fail, headers)`."""
+    now = time.monotonic()
+    with cfg.lock:
+        cfg.requests += 1
+        fail = random.random() < cfg.error_rate
+        headers = {}
+        if cfg.rpm:
+            while cfg.recent and cfg.recent[0] <= now - 60:
+                cfg.recent.popleft()
+            limited = len(cfg.recent) >= cfg.rpm
+            if not limited:
+                cfg.recent.append(now)
+            reset = 60 - (now - cfg.recent[0]) if cfg.recent else 0
+            headers = {"x-ratelimit-limit-requests": str(cfg.rpm),
+                       "x-ratelimit-remaining-requests": str(cfg.rpm - len(cfg.recent)),
+                       "x-ratelimit-reset-requests": f"{reset:.3f}s"}
+            if limited:
+                fail = True
+                headers["retry-after"] = f"{reset:.3f}"
+        if fail:
+            cfg.errors += 1
+    return fail, headers
+
+
+def _tokens(text):
+    # Roughly one token per word, keeping whitespace attached
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        cfg = self.config
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        fail, limit_headers = _admit(cfg)
+        if fail:
+            self._json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                       {"retry-after": str(cfg.retry_after), **limit_headers})
+            return
+
+        model = body.get("model", "mock")
+        messages = body.get("messages", [])
+        text = _report_for(messages, cfg.words_per_section)
+        tokens = _tokens(text)
+        limit = body.get("max_completion_tokens") or body.get("max_tokens")
+        finish_reason = "stop"
+        if limit and len(tokens) > limit:
+            tokens, finish_reason = tokens[:limit], "length"
+            text = "".join(tokens)
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        time.sleep(cfg.ttft)
+
+        if not body.get("stream"):
+            time.sleep(len(tokens) / cfg.tokens_per_second)
+            self._json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": finish_reason,
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            }, limit_headers)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        for k, v in limit_headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.close_connection = True
+
+        def send(payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            step = max(1, cfg.chunk_tokens)
+            for i in range(0, len(tokens), step):
+                send({"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                      "created": int(time.time()), "model": model,
+                      "choices": [{"index": 0, "delta": {"content": "".join(tokens[i:i + step])},
+                                   "finish_reason": None}]})
+                time.sleep(step / cfg.tokens_per_second)
+            send({"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                  "created": int(time.time()), "model": model,
+                  "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                send({"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                      "created": int(time.time()), "model": model, "choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """Start the server on a daemon thread; returns `(server, base_url)`."""
+    handler = type("Handler", (_Handler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--words-per-section", type=int, default=250)
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--rpm", type=int, help="Requests per minute before answering 429")
+    args = parser.parse_args(argv)
+    cfg = MockConfig(ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+                     words_per_section=args.words_per_section, error_rate=args.error_rate,
+                     rpm=args.rpm)
+    server, url = start_mock_server(cfg, args.host, args.port)
+    print(f"Mock OpenAI API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Synthetic code guides shaped like the NDIS one, in docx and csv form."""
+import csv
+import os
+import random
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from docx import Document
+
+HEADERS = ["Support Item", "Support Item Ref No.", "Description", "UOM", "Quote Required"]
+ROWS_PER_TABLE = 500
+
+_NOUNS = ("Wheelchair Shower Commode Hoist Ramp Rollator Cushion Seating Bed Rail Orthosis "
+          "Prosthesis Hearing Vision Communication Switch Walker Frame Mattress Sling").split()
+_QUALIFIERS = ("Manual Powered Custom Portable Paediatric Bariatric Folding Rigid Tilt "
+               "Standard Basic Complex Modular Adjustable").split()
+_WORDS = ("device assists participant with mobility transfer posture pressure support daily "
+          "living activities community access independence carer safety home environment "
+          "clinical assessment required prescription fitting").split()
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        item = f"{rng.choice(_NOUNS)} - {rng.choice(_QUALIFIERS)} - {rng.choice(_QUALIFIERS)}"
+        desc = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(10, 30))).capitalize() + "."
+        yield [item, f"05_{i:09d}_0103_1_2", desc, "Each", rng.choice("YN")]
+
+
+def ref_for(i):
+    return f"05_{i:09d}_0103_1_2"
+
+
+def write_csv(path, n, seed=0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(make_rows(n, seed))
+    return path
+
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _row_xml(cells):
+    return "<w:tr>" + "".join(
+        f"<w:tc><w:p><w:r><w:t xml:space=\"preserve\">{escape(c)}</w:t></w:r></w:p></w:tc>"
+        for c in cells
+    ) + "</w:tr>"
+
+
+def write_docx(path, n, seed=0):
+    """Write `n` rows as tables of ROWS_PER_TABLE, streaming document.xml into the zip.
+
+    python-docx is only used for the package skeleton; building a large table
+    through its object model would take far longer than parsing it.
+    """
+    skeleton = BytesIO()
+    Document().save(skeleton)
+    grid = "<w:tblGrid>" + '<w:gridCol w:w="1800"/>' * len(HEADERS) + "</w:tblGrid>"
+    with zipfile.ZipFile(skeleton) as src, \
+            zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            if info.filename != "word/document.xml":
+                dst.writestr(info, src.read(info.filename))
+        with dst.open("word/document.xml", "w") as out:
+            out.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      f"<w:document {_W}><w:body>".encode())
+            rows = make_rows(n, seed)
+            done = 0
+            while done < n:
+                out.write(b"<w:p><w:r><w:t>Category</w:t></w:r></w:p><w:tbl>")
+                out.write(grid.encode())
+                out.write(_row_xml(HEADERS).encode())
+                for _ in range(min(ROWS_PER_TABLE, n - done)):
+                    out.write(_row_xml(next(rows)).encode())
+                    done += 1
+                out.write(b"</w:tbl>")
+            out.write(b"<w:sectPr/></w:body></w:document>")
+    return path
+
+
+def ensure_catalogue(workdir, fmt, n, seed=0):
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, f"synthetic_{n}.{fmt}")
+    if not os.path.exists(path):
+        (write_docx if fmt == "docx" else write_csv)(path, n, seed)
+    return path
+
+
+def make_report(words_per_section=250, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for i in range(1, 7):
+        lines = [f"**Section {i} heading**"]
+        words = [rng.choice(_WORDS) for _ in range(words_per_section)]
+        for j in range(0, len(words), 15):
+            lines.append("*   " + " ".join(words[j:j + 15]))
+        parts.append(f"===SECTION {i}===\n" + "\n".join(lines) + "\n")
+    return "\n".join(parts)
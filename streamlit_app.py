@@ -1,17 +1,23 @@
+import itertools
 import os
-import re
 import time
-from dotenv import load_dotenv
 import streamlit as st
-import pandas as pd
-from openai import OpenAI
-from io import BytesIO
-from docx import Document
-from trubrics import Trubrics
-from streamlit_feedback import streamlit_feedback
-
-# Load local .env when running locally
-load_dotenv()
+from at_lookup import config
+from at_lookup.assets import MASCOT, SPINNER_ICON, image_variant
+from at_lookup.catalogue import DEFAULT_PATH, get_catalogue, normalise_ref, read_source_bytes
+from at_lookup.credentials import MISSING_OPENAI_KEY, openai_credentials, trubrics_api_key
+from at_lookup.feedback import get_feedback_queue, save_feedback
+from at_lookup.llm import (assemble_report, generate_groups, is_cacheable, make_client,
+                           parse_groups, stream_text)
+from at_lookup.metrics import RequestTrace, start_metrics_server
+from at_lookup.prompt import PROMPT_VERSION, build_system_prompt, build_user_prompt, fit_context
+from at_lookup.reload import watch_catalogue
+from at_lookup.response_cache import get_response_cache, make_key
+from at_lookup.search import get_search_index
+from at_lookup.sections import TAB_LABELS, SectionStream, parse_sections
+from at_lookup.semantic import get_semantic_index
+from at_lookup.theme import CSS
+from at_lookup.tokens import count_prompt_tokens
 
 
 # Page configuration
@@ -20,185 +26,33 @@ st.set_page_config(
     layout="wide"
 )
 
-# Global CSS for readability - FIXED VERSION
-st.markdown(
-    """
-    <style>
-    html, body, [class*="css"], .block-container {
-        font-size: 24px !important;
-        line-height: 1.6 !important;
-    }
-    .stTextInput label, .stSelectbox label, .stTextArea label {
-        font-size: 22px !important;
-    }
-    
-    /* Tab styling - consolidated and corrected */
-    /* Tab styling - Modern Office Look */
-.stTabs [data-baseweb="tab-list"] {
-    gap: 8px;
-}
-
-.stTabs [data-baseweb="tab"] {
-    height: 50px;
-    padding: 0.75rem 1.5rem !important;
-    font-size: 30px !important;
-    font-weight: 600 !important;
-    background-color: #e8f4f8 !important;
-    border: 2px solid #4a90a4 !important;
-    border-bottom: none !important;
-    border-radius: 6px 6px 0 0 !important;
-    box-shadow: 0 -3px 6px rgba(0,0,0,0.15) !important;
-    background-image: linear-gradient(145deg, #ffffff 0%, #e8f4f8 100%) !important;
-}
-
-.stTabs [data-baseweb="tab"][aria-selected="true"] {
-    font-size: 30px !important;
-    font-weight: 700 !important;
-    color: #1f77b4 !important;
-    background-color: #ffffff !important;
-    border-color: #2c5f73 !important;
-    border-width: 3px !important;
-    box-shadow: 0 -8px 16px rgba(44,95,115,0.25) !important;
-}
-
-.stTabs [data-baseweb="tab"] p {
-    font-size: 30px !important;
-    font-weight: inherit !important;
-    margin: 0 !important;
-}
-
-/* Alternative selectors for different Streamlit versions */
-.stTabs [role="tab"] {
-    font-size: 30px !important;
-    padding: 0.75rem 1.5rem !important;
-    font-weight: 600 !important;
-    background-color: #e8f4f8 !important;
-    border: 2px solid #4a90a4 !important;
-    border-bottom: none !important;
-    border-radius: 6px 6px 0 0 !important;
-    box-shadow: 0 -3px 6px rgba(0,0,0,0.15) !important;
-    background-image: linear-gradient(145deg, #ffffff 0%, #e8f4f8 100%) !important;
-}
-
-.stTabs [role="tab"][aria-selected="true"] {
-    font-size: 30px !important;
-    font-weight: 700 !important;
-    background-color: #ffffff !important;
-    border-color: #2c5f73 !important;
-    border-width: 3px !important;
-    box-shadow: 0 -8px 16px rgba(44,95,115,0.25) !important;
-}
-
-/* any tab NOT aria-selected */
-.stTabs [data-baseweb="tab"]:not([aria-selected="true"]),
-.stTabs [role="tab"]:not([aria-selected="true"]) {
-    color: #444444 !important;
-}
-    
-    .block-container {
-        padding: 3rem 5rem !important;
-    }
-    .landing-section {
-        background-color: #f8f9fa;
-        padding: 2rem;
-        border-radius: 0.5rem;
-        margin-bottom: 2rem;
-        color: #212529 !important;
-    }
-    .landing-section h2, .landing-section h3, .landing-section p {
-        color: #212529 !important;
-    }
-    .feature-box {
-        background-color: #e3f2fd;
-        padding: 1.5rem;
-        border-radius: 0.5rem;
-        margin-bottom: 1rem;
-        border-left: 4px solid #2196f3;
-        color: #1565c0 !important;
-    }
-    .feature-box h3 {
-        color: #1565c0 !important;
-        margin-bottom: 1rem;
-    }
-    .feature-box p, .feature-box li {
-        color: #1565c0 !important;
-    }
-    .feature-box ul, .feature-box ol {
-        color: #1565c0 !important;
-    }
-    .feature-box strong {
-        color: #0d47a1 !important;
-    }
-    /* Ensure all text elements in these containers are visible */
-    .landing-section *, .feature-box * {
-        color: inherit !important;
-    }
-    .title-container {
-        display: flex;
-        align-items: center;
-        gap: 20px;
-        margin-bottom: 2rem;
-    }
-    .title-text {
-        flex: 1;
-    }
-    .title-image {
-        flex-shrink: 0;
-    }
-    .feedback-section {
-        background-color: #1565c0;
-        padding: 2rem;
-        border-radius: 0.5rem;
-        margin-bottom: 2rem;
-        border-left: 4px solid #003366;
-        color: #ffffff !important;
-    }
-    .feedback-section h2, .feedback-section h3, .feedback-section p {
-        color: #ffffff !important;
-    }
-    .feedback-section strong {
-        color: #ffffff !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# Global CSS for readability
+st.markdown(CSS, unsafe_allow_html=True)
 
 # Retrieve OpenAI credentials (local .env or Streamlit secrets)
-api_key = os.getenv("OPENAI_API_KEY")
-project_id = os.getenv("OPENAI_PROJECT_ID")
-try:
-    secrets = st.secrets
-    api_key     = api_key     or secrets.get("OPENAI_API_KEY")
-    project_id  = project_id  or secrets.get("OPENAI_PROJECT_ID")
-    if "openai" in secrets:
-        api_key     = api_key     or secrets["openai"].get("api_key")
-        project_id  = project_id  or secrets["openai"].get("project_id")
-except Exception:
-    pass
-
+api_key, project_id = openai_credentials(st.secrets)
 if not api_key:
-    st.error(
-        "🚨 Missing OpenAI API key!\n\n"
-        "Provide it in a local `.env`:\n\n"
-        "```bash\nexport OPENAI_API_KEY=\"sk-...\"\n```\n\n"
-        "or via Streamlit Secrets (TOML):\n\n"
-        "```toml\nOPENAI_API_KEY = \"sk-...\"\n[openai]\napi_key = \"sk-...\"\nproject_id = \"...\"\n```"
-    )
+    st.error(MISSING_OPENAI_KEY)
     st.stop()
 
-# Initialise OpenAI client
-client = OpenAI(api_key=api_key, project=project_id)
 
-# Initialise Trubrics client
-try:
-    tr_api_key = os.getenv("TRUBRICS_API_KEY") or st.secrets.get("TRUBRICS_API_KEY")
-    if tr_api_key:
-        tb = Trubrics(api_key=tr_api_key)
-    else:
-        tb = None
-except Exception:
-    tb = None
+# Clients are built once per process and shared by every session and rerun
+@st.cache_resource(show_spinner=False)
+def get_client(api_key, project_id):
+    # Requests are rate limited process-wide
+    return make_client(api_key, project_id)
+
+
+MODEL = config.MODEL
+section_groups = parse_groups(config.SECTION_GROUPS)
+
+# Prometheus-style /metrics endpoint, started once per process
+if config.METRICS_PORT:
+    start_metrics_server(config.METRICS_PORT)
+
+# Swap in a replaced code guide in the background, once per process
+if os.path.exists(DEFAULT_PATH):
+    watch_catalogue(DEFAULT_PATH, get_response_cache())
 
 # App title with image
 col1, col2 = st.columns([5, 1])
@@ -213,7 +67,7 @@ with col2:
         unsafe_allow_html=True
     )
     try:
-        st.image("data/BillyTBot.png", caption="Billy the AT guide", width=300)
+        st.image(image_variant(MASCOT, 300), caption="Billy the AT guide", width=300)
     except FileNotFoundError:
         st.write("🤖 Billy the AT guide")  # Fallback if image not found
     st.markdown("</div>", unsafe_allow_html=True)
@@ -302,7 +156,51 @@ with tab2:
     # Tool interface (existing code)
     # Sidebar inputs
     st.sidebar.header("Configuration")
-    ref_no = st.sidebar.text_input("Support Item Ref No.")
+    search_q = st.sidebar.text_input(
+        "Find a Support Item",
+        help="Type words from an item's name or description (e.g. 'shower commode'), part of a Ref No., "
+             "or describe a need."
+    )
+    if search_q.strip() and os.path.exists(DEFAULT_PATH):
+        try:
+            catalogue = get_catalogue(DEFAULT_PATH)
+        except Exception as e:
+            st.sidebar.error(f"Error loading document: {e}")
+            catalogue = None
+        candidates = []
+        if catalogue is not None:
+            # Meaning-based search is offered once `python -m at_lookup build-embeddings` has run
+            semantic_index = get_semantic_index(catalogue, DEFAULT_PATH)
+            search_by = "Words"
+            if semantic_index is not None:
+                search_by = st.sidebar.radio(
+                    "Search by",
+                    ["Words", "Meaning"],
+                    horizontal=True,
+                    help="'Meaning' matches a described need (e.g. 'help a child sit for meals') "
+                         "to items with similar descriptions."
+                )
+            index = semantic_index if search_by == "Meaning" else get_search_index(catalogue)
+            candidates = index.search(search_q, k=10)
+        if candidates:
+            labels = {ref: f"{ref} · {item}" for ref, item, _ in candidates}
+
+            def _use_candidate():
+                if st.session_state.search_choice:
+                    st.session_state.ref_no = st.session_state.search_choice
+
+            st.sidebar.selectbox(
+                "Matching items",
+                list(labels),
+                index=None,
+                format_func=labels.get,
+                placeholder="Choose an item to fill in its Ref No.",
+                key="search_choice",
+                on_change=_use_candidate
+            )
+        elif catalogue is not None:
+            st.sidebar.caption("No matching items.")
+    ref_no = st.sidebar.text_input("Support Item Ref No.", key="ref_no")
     extra_ctx = st.sidebar.text_area(
         "Additional Context (optional)",
         help=(
@@ -311,14 +209,25 @@ with tab2:
             "Be succinct but include enough detail to guide the analysis."
         )
     )
+    if fit_context(extra_ctx)[1]:
+        st.sidebar.warning("Additional context is long; only its first "
+                           f"~{config.MAX_CONTEXT_TOKENS} tokens will be used.")
+    force_refresh = st.sidebar.checkbox(
+        "Force refresh",
+        help="Ignore any cached analysis for this item and generate a new one."
+    )
+    parallel_mode = st.sidebar.checkbox(
+        "Parallel section generation",
+        value=config.PARALLEL_SECTIONS,
+        help="Generate the six sections as separate concurrent requests. Faster overall, "
+             "but tabs fill in whole sections at a time instead of streaming."
+    )
     run_search = st.sidebar.button("Search")
 
     # Add download button for code guide
-    with open("data/support_items.docx", "rb") as f:
-        code_guide_bytes = f.read()
     st.sidebar.download_button(
         label="Download Code Guide if required",
-        data=code_guide_bytes,
+        data=read_source_bytes(DEFAULT_PATH),
         file_name="support_items.docx",
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
@@ -331,57 +240,35 @@ with tab2:
         st.sidebar.error("Please enter a valid Support Item Ref No.")
         st.stop()
 
-    # Load support-items document
-    default_path = os.path.join("data", "support_items.docx")
-    if not os.path.exists(default_path):
-        st.error(f"Default document not found at `{default_path}`")
+    # Time every phase of this request for the JSON log and /metrics
+    trace = RequestTrace("app", model=MODEL, ref=ref_no.strip(),
+                         mode="parallel" if parallel_mode else "stream",
+                         context=bool(extra_ctx.strip()))
+
+    # Load support-items catalogue (parsed once per process, shared by all sessions)
+    if not os.path.exists(DEFAULT_PATH):
+        trace.finish(status="error")
+        st.error(f"Default document not found at `{DEFAULT_PATH}`")
         st.stop()
 
-    with open(default_path, "rb") as f:
-        sf = BytesIO(f.read())
-    sf.name = os.path.basename(default_path)
-
-    # Helper: load DataFrame from docx/csv/xlsx
-    def load_df(file):
-        name = file.name.lower()
-        if name.endswith((".xlsx", "xls")):
-            return pd.read_excel(file)
-        if name.endswith(".csv"):
-            return pd.read_csv(file)
-        if name.endswith(".docx"):
-            doc = Document(BytesIO(file.read()))
-            tables = []
-            for tbl in doc.tables:
-                headers = [c.text.strip() for c in tbl.rows[0].cells]
-                required = {"Support Item Ref No.", "Support Item", "Description"}
-                if required.issubset(headers):
-                    rows = []
-                    for row in tbl.rows[1:]:
-                        rows.append({hdr: row.cells[idx].text.strip()
-                                     for idx, hdr in enumerate(headers)})
-                    tables.append(pd.DataFrame(rows))
-            if tables:
-                return pd.concat(tables, ignore_index=True)
-        return None
-
-    # Parse the support-items document
     try:
-        df = load_df(sf)
-        if df is None:
-            raise ValueError("Could not parse the document. Check its format.")
+        with trace.phase("catalogue_load"):
+            catalogue = get_catalogue(DEFAULT_PATH)
     except Exception as e:
+        trace.finish(status="error")
         st.error(f"Error loading document: {e}")
         st.stop()
 
     # Lookup by Ref No.
-    df.columns = [c.strip() for c in df.columns]
-    match = df[df["Support Item Ref No."].astype(str).str.strip() == ref_no.strip()]
-    if match.empty:
+    with trace.phase("lookup"):
+        match = catalogue.lookup(ref_no)
+    if match is None:
+        trace.finish(status="not_found")
         st.error(f"Ref No. '{ref_no}' not found.")
         st.stop()
 
-    support_item_text = match.iloc[0]["Support Item"].strip()
-    description       = match.iloc[0]["Description"].strip()
+    support_item_text = match["Support Item"].strip()
+    description       = match["Description"].strip()
 
     # Display chosen item
     st.subheader("Support Item Details")
@@ -389,126 +276,120 @@ with tab2:
     st.info(f"**Description:** {description}")
 
     # Build prompts with explicit section markers
-    system_prompt = (
-        "You are an expert NDIS Assistive Technology (AT) market analyst and an experienced allied-health clinician. Your task is to generate a comprehensive, six-part market analysis for a given NDIS Support Item.\n\n"
-        "You will be provided with the Support Item's name, its official description, and optional clinical context. You MUST structure your response into exactly six sections, each starting with the delimiter ===SECTION N===.\n\n"
-        "<instructions>\n"
-        "1.  **Adhere strictly to the six-section format.** Do not merge, omit, or add sections.\n"
-        "2.  **Use clear, professional language.** Write for an audience of clinicians, support coordinators, and NDIS planners.\n"
-        "3.  **Provide concrete examples.** Use bullet points for lists of features, models, and questions.\n"
-        "4.  **Reference Australian market conditions.** Mention TGA regulations where applicable.\n"
-        "5.  **Be objective and comprehensive.** Cover a range of brands and price points.\n"
-        "6.  **Only include sub-types and device types that are clinically and commercially recognised for the given Support Item in Australia.**\n"
-        "</instructions>\n\n"
-        "Here is the structure and an example of the desired output for each section:\n\n"
-        "---\n\n"
-        "===SECTION 1===\n"
-        "**Core Function, Clinical Need & Key Use-Cases for NDIS participants.**\n"
-        "*   **Core Function:** [Succinctly state the primary purpose of this AT category. What problem does it solve?]\n"
-        "*   **Clinical Need:** [Describe the specific functional impairments or disabilities this AT addresses.]\n"
-        "*   **Key NDIS Use-Cases:**\n"
-        "    *   [Example Use-Case 1: e.g., \"Enabling independent community access for a participant with limited mobility.\"]\n"
-        "    *   [Example Use-Case 2: e.g., \"Providing postural support during mealtimes for a child with cerebral palsy.\"]\n"
-        "    *   [Example Use-Case 3: e.g., \"Reducing carer strain during transfers for a participant with high physical support needs.\"]\n\n"
-        "===SECTION 2===\n"
-        "**Full Taxonomy of Device Types & Form Factors.**\n"
-        "*   **Primary Category:** [e.g., Manual Wheelchairs]\n"
-        "    *   List all clinically and commercially relevant sub-types for this category, based on Australian market conventions. Do not include sub-types that are not commonly recognised or appropriate for this Support Item. For each sub-type, specify the form factor. For example:\n"
-        "        *   **Sub-type:** [e.g., Rigid Frame Wheelchairs]\n"
-        "            *   **Form Factor:** [e.g., Ultra-lightweight, folding/non-folding]\n"
-        "        *   **Sub-type:** [e.g., Folding Frame Wheelchairs]\n"
-        "            *   **Form Factor:** [e.g., Standard, bariatric]\n"
-        "        *   **Sub-type:** [e.g., Tilt-in-Space Wheelchairs]\n"
-        "            *   **Form Factor:** [e.g., Manual tilt, attendant-propelled]\n"
-        "===SECTION 3===\n"
-        "**For each Device Type: Feature Sets, Brands/Models, and Regulatory Notes.**\n"
-        "*   **Device Type:** [e.g., Rigid Frame Wheelchairs]\n"
-        "    *   **Key Feature Sets:** [e.g., Custom-scripted frame geometry, quick-release axles, adjustable centre of gravity, side guards (carbon fibre vs. aluminium).]\n"
-        "    *   **Example Brands/Models:** [e.g., \"Quickie (Nitrum, GPV), TiLite (TRA, ZRA), Panthera (X, S3)\"]\n"
-        "    *   **Regulatory Notes:** [e.g., \"Must meet AS/NZS 3695.1. TGA registration may be required for certain medical claims.\"]\n"
-        "*   **Device Type:** [e.g., Tilt-in-Space Wheelchairs]\n"
-        "    *   **Key Feature Sets:** [e.g., Gas-strut or cable-activated tilt mechanism (0-55 degrees), elevating leg rests, transit tie-down points.]\n"
-        "    *   **Example Brands/Models:** [e.g., \"Glide (Series 4, G2), Sunrise Medical (Iris), Ki Mobility (Focus CR)\"]\n"
-        "    *   **Regulatory Notes:** [e.g., \"Often prescribed as part of a complex seating system. Requires a thorough clinical assessment.\"]\n\n"
-        "===SECTION 4===\n"
-        "**Innovative or Forward-Looking Technologies.**\n"
-        "*   **Materials Science:** [e.g., \"Use of 3D-printed titanium or carbon fibre composites for custom frame components, reducing weight while maintaining strength.\"]\n"
-        "*   **Smart Features & IoT:** [e.g., \"Integration of power-assist wheels (e.g., SmartDrive, Twion) with companion apps for tracking distance, battery life, and push efficiency.\"]\n"
-        "*   **Ergonomics & Design:** [e.g., \"Dynamic backrests that move with the user, and novel suspension systems (e.g., Frog Legs) to reduce whole-body vibration.\"]\n\n"
-        "===SECTION 5===\n"
-        "**Critical Questions & Adjacent Solutions.**\n"
-        "*   **Critical Questions for Assessment:**\n"
-        "    *   [e.g., \"What are the participant's key environments (home, work, community)? Are there ramps, tight corners, or uneven surfaces?\"]\n"
-        "    *   [e.g., \"How will the device be transported? Does it need to fit in a specific vehicle?\"]\n"
-        "    *   [e.g., \"What is the participant's projected functional change over the next 5 years?\"]\n"
-        "*   **Adjacent or Complementary Solutions:**\n"
-        "    *   [e.g., \"Pressure care cushions (Roho, Jay) are almost always required.\"]\n"
-        "    *   [e.g., \"Vehicle modifications for transport.\"]\n"
-        "    *   [e.g., \"Specialised wheelchair bags and accessories.\"]\n\n"
-        "===SECTION 6===\n"
-        "**Three Authoritative Sources for NDIS Specs & Market Data.**\n"
-        "*   **1. Supplier Catalogues:** [e.g., \"Aidacare (aidacare.com.au) or Independent Living Specialists (ilsau.com.au) - for retail pricing and technical specifications.\"]\n"
-        "*   **2. Professional Associations:** [e.g., \"Assistive Technology Suppliers Australasia (ATSA) - their annual expo and member directory provide a broad market overview.\"]\n"
-        "*   **3. NDIS-Specific Databases:** [e.g., \"Seating and Wheeled Mobility technical resources from state-based bodies like EnableNSW or Indigo (WA).\"]\n"
-    )
-    user_prompt = (
-        f"Support Item: '{support_item_text}'\n"
-        f"Description: '{description}'"
-    )
-    if extra_ctx.strip():
-        user_prompt += f"\n\nAdditional context: {extra_ctx.strip()}"
-
-    # Call the LLM 
-    icon_path = "data/billy_tea_icon.png"
-
+    with trace.phase("prompt"):
+        system_prompt = build_system_prompt()
+        user_prompt = build_user_prompt(support_item_text, description, extra_ctx)
+        trace.set(prompt_tokens_counted=count_prompt_tokens(system_prompt, user_prompt, MODEL))
+
+    # Serve repeated lookups from the persistent response cache
+    cache = get_response_cache()
+    cache_key = make_key(system_prompt, user_prompt, MODEL, PROMPT_VERSION)
+    with trace.phase("cache_lookup"):
+        report = None if force_refresh else cache.get(cache_key)
+    trace.set(cache="refresh" if force_refresh else "hit" if report is not None else "miss")
+
+    # Render as tabs; placeholders are filled as each section's text arrives
     icon_placeholder = st.empty()  # Create a placeholder for the icon
-
-    with st.spinner("Generating market analysis, will be with you soon. Have a cup of Billy Tea while you wait"):
-        icon_placeholder.image(icon_path, width=128)
-        try:
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user",   "content": user_prompt}
-                ]
-            )
-            report = resp.choices[0].message.content
-        except Exception as e:
-            icon_placeholder.empty()  # Remove icon if error
-            st.error(f"API error: {e}")
-            st.stop()
-
-    icon_placeholder.empty()  # Remove icon after analysis is complete
-
-    # Split on explicit markers
-    parts = re.split(r"^===SECTION (\d+)===\s*$", report, flags=re.MULTILINE)
-    sections = {str(i): "No content returned." for i in range(1, 7)}
-    for idx in range(1, len(parts), 2):
-        num = parts[idx]
-        body = parts[idx+1].strip()
-        if num in sections:
-            sections[num] = body
-
-    # Render as tabs
-    tab_labels = [
-        "1. Core Function",
-        "2. Device Types",
-        "3. Features",
-        "4. Innovations",
-        "5. Questions",
-        "6. Sources"
-    ]
-    tabs = st.tabs(tab_labels)
+    tabs = st.tabs(TAB_LABELS)
+    placeholders = []
     for i, tab in enumerate(tabs, start=1):
         with tab:
-            st.write(sections.get(str(i)))
+            placeholders.append(st.empty())
             if i == 6:
                 st.markdown(
                     "or check out this: [National Equipment Database (ASK NED)](https://askned.com.au/?srsltid=AfmBOoojNrzCgjK9bX2oPfUHkxMPmggZGTWEjbKI0-t1G2j3i6jAz1i0)",
                     unsafe_allow_html=True
                 )
 
+    # Call the LLM; the client (and the openai import) is only needed on a cache miss
+    if report is None:
+        client = get_client(api_key, project_id)
+    if report is None and parallel_mode:
+        icon = image_variant(SPINNER_ICON, 128)
+
+        # Fire one request per section group; fill tabs as each group lands
+        results = {}
+        cacheable = True
+        pending = generate_groups(client, MODEL, user_prompt, section_groups,
+                                  on_usage=trace.record_usage)
+        try:
+            with trace.phase("generation"):
+                with icon_placeholder.container():
+                    st.image(icon, width=128)
+                    with st.spinner("Generating market analysis, will be with you soon. Have a cup of Billy Tea while you wait"):
+                        first = next(pending)
+                trace.mark("time_to_first_section")
+                icon_placeholder.empty()  # Remove icon once the first group is back
+                for group, text, finish_reason in itertools.chain([first], pending):
+                    results[group] = text
+                    cacheable = cacheable and is_cacheable(text, finish_reason)
+                    partial = parse_sections(assemble_report({group: text}, [group]))
+                    for num in group:
+                        placeholders[num - 1].write(partial[str(num)])
+        except Exception as e:
+            trace.finish(status="api_error")
+            icon_placeholder.empty()  # Remove icon if error
+            st.error(f"API error: {e}")
+            st.stop()
+
+        report = assemble_report(results, section_groups)
+        # A cut-off or empty answer is shown once but not kept for later lookups
+        if cacheable:
+            cache.put(cache_key, report, ref_key=normalise_ref(ref_no),
+                      model=MODEL, prompt_version=PROMPT_VERSION)
+
+    elif report is None:
+        icon = image_variant(SPINNER_ICON, 128)
+
+        # Billy Tea only has to cover the wait for the first token
+        generation_start = time.perf_counter()
+        with icon_placeholder.container():
+            st.image(icon, width=128)
+            with st.spinner("Generating market analysis, will be with you soon. Have a cup of Billy Tea while you wait"):
+                try:
+                    chunks = stream_text(client, MODEL, system_prompt, user_prompt,
+                                         on_usage=trace.record_usage)
+                    trace.set(coalesced=chunks.joined)
+                    first = next(chunks, None)
+                except Exception as e:
+                    trace.finish(status="api_error")
+                    icon_placeholder.empty()  # Remove icon if error
+                    st.error(f"API error: {e}")
+                    st.stop()
+        trace.mark("time_to_first_token")
+
+        icon_placeholder.empty()  # Remove icon once tokens start arriving
+
+        parser = SectionStream()
+        dirty = set()
+        last_draw = 0.0
+        try:
+            for delta in itertools.chain([first] if first else [], chunks):
+                dirty |= parser.feed(delta)
+                # Redraw at most ~10 times a second to keep websocket traffic sane
+                if dirty and time.monotonic() - last_draw > 0.1:
+                    for num in dirty:
+                        placeholders[num - 1].write(parser.sections[str(num)])
+                    dirty.clear()
+                    last_draw = time.monotonic()
+        except Exception as e:
+            trace.finish(status="api_error")
+            st.error(f"API error: {e}")
+            st.stop()
+        trace.phases["generation"] = time.perf_counter() - generation_start
+
+        report = parser.text
+        if is_cacheable(report, chunks.finish_reason):
+            cache.put(cache_key, report, ref_key=normalise_ref(ref_no),
+                      model=MODEL, prompt_version=PROMPT_VERSION)
+
+    with trace.phase("parse"):
+        sections = parse_sections(report)
+    with trace.phase("render"):
+        for i, placeholder in enumerate(placeholders, start=1):
+            placeholder.write(sections.get(str(i)))
+    trace.finish()
+
 with tab3:
     st.markdown("""
     <div class="feedback-section">
@@ -535,23 +416,15 @@ with tab3:
     
     st.markdown("**Please take a moment to rate your experience and share any specific comments, suggestions, or issues you've encountered.**")
     
-    # Only show feedback widget if Trubrics is available
-    if tb is not None:
+    # Only show feedback widget if a feedback sink is configured; the widget is imported
+    # here, after the other tabs have been sent to the browser
+    feedback_queue = get_feedback_queue(trubrics_api_key(st.secrets))
+    if feedback_queue is not None:
+        from streamlit_feedback import streamlit_feedback
+
         def _save_feedback(resp):
             try:
-                # Extract the feedback data properly
-                feedback_data = {
-                    "score": resp.get("score"),
-                    "text": resp.get("text", ""),
-                    "feedback_type": "faces",
-                    "timestamp": time.time()
-                }
-                
-                tb.track(
-                    user_id="anonymous",
-                    event="app_feedback",
-                    properties=feedback_data
-                )
+                save_feedback(feedback_queue, resp)
                 st.success("🎉 Thank you for your feedback! Your input helps us make this tool better for everyone.")
             except Exception as e:
                 st.error(f"Error saving feedback: {e}")
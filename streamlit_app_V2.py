@@ -7,7 +7,6 @@ import pandas as pd
 from openai import OpenAI
 from io import BytesIO
 from docx import Document
-from trubrics import Trubrics
 from streamlit_feedback import streamlit_feedback
 
 # Load local .env when running locally
@@ -116,10 +115,11 @@ if not api_key:
 # Initialise OpenAI client
 client = OpenAI(api_key=api_key, project=project_id)
 
-# Initialise Trubrics client
+# Initialise Trubrics client (optional: the SDK is no longer in requirements.txt)
 try:
     tr_api_key = os.getenv("TRUBRICS_API_KEY") or st.secrets.get("TRUBRICS_API_KEY")
     if tr_api_key:
+        from trubrics import Trubrics
         tb = Trubrics(api_key=tr_api_key)
     else:
         tb = None